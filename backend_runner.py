@@ -1,38 +1,216 @@
 # backend_runner.py
 
 import threading
-from pynput import keyboard
-from fatigue_detector import KeyboardStats, kbd_on_event, DataQueue
+from typing import NamedTuple
+from collections.abc import Hashable
+from breather_core import (
+    KeyboardEvent,
+    KeyboardStats,
+    KeyClass,
+    RunningStat,
+    FATIGUE_MODELS,
+)
+from event_bus import EventBus, EVENT, TICK, LEVEL, IDLE, CONFLATE
 from time import time
 
 
+class Snapshot(NamedTuple):
+    """Everything the tray shows, computed together once per tick."""
+
+    time: float
+    fatigue: float
+    level: str  # "low", "medium" or "high"
+    idle: bool
+    wpm: float
+    wpm_lifetime: float  # NaN until there are enough samples
+    accuracy: float  # percent
+    accuracy_lifetime: float
+    flight_time: float
+    flight_time_lifetime: float
+    hold_time: float
+    hold_time_lifetime: float
+    features: tuple[float, ...]  # KeyboardStats.features()
+    scores: tuple[float, ...]  # of every model, in FATIGUE_MODELS order
+
+
 class FatigueMonitor(threading.Thread):
-    def __init__(self):
+    def __init__(
+        self,
+        exporter=None,
+        recorder=None,
+        model_name="linear",
+        listen=True,
+        shm=None,
+    ):
         super().__init__(daemon=True)  # Daemon thread, dies with main app
         self.keyboard_stats = KeyboardStats()
+        # the registered fatigue model driving the tray, the others are
+        # scored alongside it from the same features and published in the
+        # snapshots' `scores` for comparison
+        self.model_name = model_name
+        self.model = FATIGUE_MODELS[model_name]
+        self.exporter = exporter  # optional MetricsExporter
+        self.recorder = recorder  # optional TraceRecorder
+        # pushes EVENT, TICK, LEVEL and IDLE updates to subscribers
+        self.bus = EventBus()
+        if exporter is not None:
+            self.keyboard_stats.on_metrics = exporter.record_event
+            self.bus.subscribe(TICK, exporter.record_snapshot, maxsize=1024)
+        self.shm = shm  # optional ShmPublisher
+        if shm is not None:
+            self.bus.subscribe(TICK, shm.publish, policy=CONFLATE)
+            self.bus.subscribe(IDLE, shm.set_idle)
         self._lock = threading.Lock()
-        self._fatigue_history = DataQueue(max_time=120)
         self.SAMPLES_CUTOFF = 600
 
-        self.listener = keyboard.Listener(
-            on_press=lambda k, i: kbd_on_event(k, True, self.keyboard_stats),
-            on_release=lambda k, i: kbd_on_event(k, False, self.keyboard_stats),
-        )
+        # metrics are computed on this thread every TICK_INTERVAL seconds
+        # and delivered as TICK snapshots on the bus
+        self.TICK_INTERVAL = 0.5
 
-    def start(self):
-        self.listener.start()
+        # idle state: no key events for IDLE_AFTER seconds or screen locked
+        self.IDLE_AFTER = 60
+        self.idle = False
+        self.screen_locked = False
+        self._idle_lock = threading.Lock()
+        self._last_event_time = time()
+        self._last_snapshot: Snapshot | None = None
+        self._activity = threading.Event()  # set on the keystroke ending idle
+        self._stopped = threading.Event()
 
-    def get_latest_fatigue(self) -> float:
+        # without the keyboard hook, events are fed through ingest()
+        # directly (e.g. by the soak test), and pynput is never imported
+        self.listener = None
+        if listen:
+            from pynput import keyboard
+            from fatigue_detector import key_class
+
+            def on_key(key, pressed: bool):
+                if key is not None:  # NOTE: should we handle unknown keys?
+                    self.ingest(key, pressed, key_class(key))
+
+            self.listener = keyboard.Listener(
+                on_press=lambda k, i: on_key(k, True),
+                on_release=lambda k, i: on_key(k, False),
+            )
+
+    def ingest(
+        self,
+        key: Hashable,
+        pressed: bool,
+        key_class: KeyClass = KeyClass.OTHER,
+    ):
+        """
+        Feed one key event. `key` only has to tell keys apart (a pynput key,
+        a name, an int), `key_class` is what the statistics look at.
+        """
+        if self.screen_locked:
+            return  # don't learn from what is typed on the lock screen
+        t = time()
+        if self.idle:
+            self.keyboard_stats.resume()
+            self._set_idle(False, t)
+        self._last_event_time = t
+
+        event = KeyboardEvent(key, pressed, t, key_class)
         with self._lock:
-            # if not self._fatigue_history:
-            #     return 0.0
-            fatigue = self.keyboard_stats.fatigue()
-            self._fatigue_history.push((time(), fatigue))
-            return fatigue
+            self.keyboard_stats.push(event)
+        if self.recorder is not None:
+            self.recorder.record(event)
+        self.bus.publish(EVENT, event)
+
+    def _set_idle(self, idle: bool, since: float):
+        with self._idle_lock:
+            if self.idle == idle:
+                return
+            self.idle = idle
+            if not idle:
+                self._activity.set()
+            self.bus.publish(IDLE, (idle, since))
+
+    def set_screen_locked(self, locked: bool):
+        """Optional screen-lock signal, locking goes idle right away."""
+        self.screen_locked = locked
+        if locked:
+            self._set_idle(True, time())
 
-    def get_fatigue_sum(self) -> float:
+    def start(self):
+        if self.listener is not None:
+            self.listener.start()
+        super().start()
+
+    def run(self):
+        # ticks while typing, and while idle sleeps until the next keystroke
+        next_tick = time()
+        while not self._stopped.is_set():
+            if self.idle:
+                self._activity.wait()
+                self._activity.clear()
+                next_tick = time()
+                continue
+            if time() - self._last_event_time >= self.IDLE_AFTER:
+                self._set_idle(True, self._last_event_time)
+                continue
+
+            self.tick()
+            next_tick += self.TICK_INTERVAL
+            self._stopped.wait(max(next_tick - time(), 0))
+
+    def fatigue_level(self, fatigue: float) -> str:
+        medium, high = self.model.thresholds
+        if fatigue >= high:
+            return "high"
+        if fatigue >= medium:
+            return "medium"
+        return "low"
+
+    def _lifetime(self, stat: RunningStat) -> float:
+        return stat.mean if stat.n > self.SAMPLES_CUTOFF else float("nan")
+
+    def tick(self) -> Snapshot:
+        """
+        Compute and publish a snapshot of all the metrics. While idle the
+        last snapshot is returned as nothing has changed since.
+        """
         with self._lock:
-            return sum(f for _, f in self._fatigue_history)
+            last = self._last_snapshot
+            if self.idle and last is not None:
+                return last
+
+            stats = self.keyboard_stats
+            features = stats.features()
+            scores = {
+                name: model(features) for name, model in FATIGUE_MODELS.items()
+            }
+            fatigue = scores[self.model_name]
+            t = time()
+            backspace_lifetime = self._lifetime(stats.backspace_times.baseline)
+            snapshot = Snapshot(
+                time=t,
+                fatigue=fatigue,
+                level=self.fatigue_level(fatigue),
+                idle=self.idle,
+                wpm=stats.wpm(),
+                wpm_lifetime=self._lifetime(stats.wpm_baseline),
+                accuracy=(1 - stats.backspace_rate()) * 100,
+                accuracy_lifetime=(1 - backspace_lifetime) * 100,
+                flight_time=stats.flight_times.mean(),
+                flight_time_lifetime=self._lifetime(
+                    stats.flight_times.baseline
+                ),
+                hold_time=stats.hold_times.mean(),
+                hold_time_lifetime=self._lifetime(stats.hold_times.baseline),
+                features=features,
+                scores=tuple(scores.values()),
+            )
+            self._last_snapshot = snapshot
+
+        self.bus.publish(TICK, snapshot)
+        if last is not None and last.level != snapshot.level:
+            self.bus.publish(LEVEL, (last.level, snapshot.level))
+        return snapshot
+
+    def get_latest_fatigue(self) -> float:
+        return self.tick().fatigue
 
     def get_wpm(self) -> float:
         with self._lock:
@@ -88,4 +266,13 @@ class FatigueMonitor(threading.Thread):
             )
 
     def stop(self):
-        self.listener.stop()
+        if self.listener is not None:
+            self.listener.stop()
+        self._stopped.set()
+        self._activity.set()
+        if self.exporter is not None:
+            self.exporter.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.shm is not None:
+            self.shm.close()
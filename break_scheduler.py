@@ -0,0 +1,234 @@
+# break_scheduler.py
+
+import heapq
+from itertools import count
+
+
+class TimerWheel:
+    """
+    All the scheduler's deadlines in one place. The owner keeps a single
+    timer armed for `next_deadline()` and calls `run_due()` when it fires,
+    so nothing wakes up between deadlines.
+    """
+
+    def __init__(self, on_change=None):
+        self._heap = []  # [deadline, seq, name, callback], callback None if cancelled
+        self._entries = {}  # name -> heap entry
+        self._seq = count()
+        # called when the next deadline may have moved, to re-arm the timer
+        self.on_change = on_change
+
+    def schedule(self, name: str, deadline: float, callback):
+        """(Re)schedule `callback(now)` under `name`."""
+        self._cancel(name)
+        entry = [deadline, next(self._seq), name, callback]
+        self._entries[name] = entry
+        heapq.heappush(self._heap, entry)
+        self._changed()
+
+    def cancel(self, name: str):
+        if self._cancel(name):
+            self._changed()
+
+    def _cancel(self, name: str) -> bool:
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return False
+        entry[3] = None  # removed lazily when it reaches the top
+        return True
+
+    def deadline(self, name: str) -> float | None:
+        entry = self._entries.get(name)
+        return entry[0] if entry else None
+
+    def next_deadline(self) -> float | None:
+        heap = self._heap
+        while heap and heap[0][3] is None:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def run_due(self, now: float):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, name, callback = heapq.heappop(heap)
+            if callback is None:
+                continue
+            del self._entries[name]
+            callback(now)
+        self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+
+class FatigueBudget:
+    """
+    Time integral of the fatigue score (trapezoids between ticks, only the
+    positive part), updated in O(1) per tick. Gaps longer than `max_gap`,
+    i.e. idle time, are not counted as work.
+    """
+
+    __slots__ = ("limit", "max_gap", "used", "_last")
+
+    def __init__(self, limit: float, max_gap: float = 2):
+        self.limit = limit  # fatigue-seconds before a break is due
+        self.max_gap = max_gap
+        self.used = 0.0
+        self._last = None  # (time, fatigue) of the previous tick
+
+    def add(self, t: float, fatigue: float):
+        fatigue = max(fatigue, 0.0)
+        if self._last is not None:
+            t0, f0 = self._last
+            dt = t - t0
+            if 0 < dt <= self.max_gap:
+                self.used += (f0 + fatigue) / 2 * dt
+        self._last = (t, fatigue)
+
+    def recover(self, amount: float):
+        self.used = max(self.used - amount, 0.0)
+
+    def reset(self):
+        self.used = 0.0
+        self._last = None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.limit
+
+
+class BreakScheduler:
+    """
+    Work/break cycles driven by a `TimerWheel`. A break is suggested when
+    the work period is over or the fatigue budget is used up; suggestions
+    repeat after `remind_after` until a break starts, and `snooze()` pushes
+    the next one back. Idle time recovers budget, and an idle period as
+    long as a break counts as one.
+    """
+
+    WORK = "work"
+    BREAK = "break"
+
+    def __init__(
+        self,
+        wheel: TimerWheel,
+        notify,
+        work_time: float = 50 * 60,
+        break_time: float = 10 * 60,
+        budget: float = 600,
+        recovery_rate: float = 1,
+        snooze_time: float = 5 * 60,
+        remind_after: float = 2 * 60,
+    ):
+        self.wheel = wheel
+        self.notify = notify  # notify(title, message)
+        self.work_time = work_time
+        self.break_time = break_time
+        self.budget = FatigueBudget(budget)
+        self.recovery_rate = recovery_rate  # budget recovered per second
+        self.snooze_time = snooze_time
+        self.remind_after = remind_after
+
+        self.state = self.WORK
+        self.break_due = False
+        self.cycle_start = 0.0
+        self._idle_since = None
+        self._work_left = None  # of the suspended work period, while idle
+
+    def start(self, now: float):
+        self._start_work(now)
+
+    def _start_work(self, now: float):
+        self.state = self.WORK
+        self.break_due = False
+        self.cycle_start = now
+        self._work_left = None
+        self.budget.reset()
+        self.wheel.cancel("remind")
+        self.wheel.schedule("cycle", now + self.work_time, self._work_over)
+
+    def start_break(self, now: float):
+        self.state = self.BREAK
+        self.break_due = False
+        self.cycle_start = now
+        self._work_left = None
+        self.wheel.cancel("remind")
+        self.wheel.schedule("cycle", now + self.break_time, self._break_over)
+        self.notify("Break time!", "Relax and breathe for a bit!")
+
+    def snooze(self, now: float):
+        if self.state == self.WORK and self.break_due:
+            self.wheel.schedule(
+                "remind", now + self.snooze_time, self._suggest_break
+            )
+
+    def _work_over(self, now: float):
+        if not self.break_due:  # otherwise reminders are already running
+            self._suggest_break(now)
+
+    def _suggest_break(self, now: float):
+        if self.state != self.WORK:
+            return
+        if self.budget.exhausted:
+            self.notify("You seem fatigued", "Your fatigue budget is used up.")
+        else:
+            self.notify("Consider taking a break!", "Time for a short break.")
+        self.break_due = True
+        self.wheel.schedule(
+            "remind", now + self.remind_after, self._suggest_break
+        )
+
+    def _break_over(self, now: float):
+        self.notify("Work Time!", "Break's over, time to grind!")
+        self._start_work(now)
+
+    def on_tick(self, t: float, fatigue: float):
+        if self.state != self.WORK:
+            return
+        self.budget.add(t, fatigue)
+        if self.budget.exhausted and not self.break_due:
+            self._suggest_break(t)
+
+    def on_idle(self, idle: bool, now: float):
+        if idle:
+            self._idle_since = now
+            if self.state == self.WORK:
+                # nobody to remind, and time away is not work time
+                deadline = self.wheel.deadline("cycle")
+                if deadline is not None:
+                    self._work_left = max(deadline - now, 0)
+                self.wheel.cancel("cycle")
+                self.wheel.cancel("remind")
+            return
+        if self._idle_since is None:
+            return
+        away = now - self._idle_since
+        self._idle_since = None
+        work_left, self._work_left = self._work_left, None
+        if self.state != self.WORK:
+            return
+        if away >= self.break_time:  # that was a break
+            self._start_work(now)
+            return
+        self.budget.recover(away * self.recovery_rate)
+        if work_left is not None:
+            self.wheel.schedule("cycle", now + work_left, self._work_over)
+        if self.break_due:
+            self.wheel.schedule(
+                "remind", now + self.remind_after, self._suggest_break
+            )
+
+    @property
+    def idle(self) -> bool:
+        return self._idle_since is not None
+
+    def progress(self, now: float) -> tuple[float, float]:
+        """Fraction of the current work or break period done, seconds left."""
+        length = self.work_time if self.state == self.WORK else self.break_time
+        deadline = self.wheel.deadline("cycle")
+        if deadline is not None:
+            remaining = max(deadline - now, 0)
+        else:  # suspended while idle, or over and the break is due
+            remaining = self._work_left or 0
+        return min(1 - remaining / length, 1.0), remaining
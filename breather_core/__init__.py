@@ -0,0 +1,37 @@
+# breather_core
+#
+# The keystroke statistics and fatigue models, without GUI or input hook
+# dependencies, for replays, sweeps, reports and other worker processes.
+# fatigue_detector.py adapts pynput keys to it.
+
+from .keys import KeyClass
+from .models import (
+    FEATURES,
+    FATIGUE_MODELS,
+    LinearModel,
+    LogisticModel,
+    register_model,
+)
+from .stats import (
+    DataEvent,
+    DataQueue,
+    KeyboardEvent,
+    KeyboardStats,
+    KeyStateTracker,
+    RunningStat,
+)
+
+__all__ = [
+    "DataEvent",
+    "DataQueue",
+    "FATIGUE_MODELS",
+    "FEATURES",
+    "KeyClass",
+    "KeyboardEvent",
+    "KeyboardStats",
+    "KeyStateTracker",
+    "LinearModel",
+    "LogisticModel",
+    "RunningStat",
+    "register_model",
+]
@@ -0,0 +1,23 @@
+# breather_core/keys.py
+
+from enum import IntEnum
+
+
+class KeyClass(IntEnum):
+    """
+    Coarse class of a key, the only key information the core needs. Input
+    hooks map their own key types onto it (see fatigue_detector.key_class).
+    """
+
+    OTHER = 0
+    LETTER = 1
+    DIGIT = 2
+    PUNCTUATION = 3
+    SPACE = 4
+    BACKSPACE = 5
+    DELETE = 6
+    ENTER = 7
+    TAB = 8
+    MODIFIER = 9
+    NAVIGATION = 10
+    FUNCTION = 11
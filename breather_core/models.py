@@ -0,0 +1,103 @@
+# breather_core/models.py
+
+import math
+
+
+FEATURES = (
+    "wpm_z",
+    "hold_z",
+    "flight_z",
+    "backspace_z",
+    "pre_correction_z",
+    "hold_std_z",
+    "flight_std_z",
+)
+
+
+class LinearModel:
+    """Weighted sum of the features, weights are given by feature name."""
+
+    __slots__ = ("weights", "bias", "thresholds")
+
+    def __init__(
+        self,
+        weights: dict[str, float],
+        bias: float = 0.0,
+        thresholds: tuple[float, float] = (0.25, 1.25),
+    ):
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features: {', '.join(unknown)}")
+        self.weights = tuple(weights.get(name, 0.0) for name in FEATURES)
+        self.bias = bias
+        # scores at which fatigue becomes medium and high
+        self.thresholds = thresholds
+
+    def __call__(self, features: tuple[float, ...]) -> float:
+        return self.bias + sum(w * x for w, x in zip(self.weights, features))
+
+
+class LogisticModel(LinearModel):
+    """Probability of fatigue, the logistic of a weighted sum."""
+
+    def __init__(self, weights, bias=0.0, thresholds=(0.5, 0.8)):
+        super().__init__(weights, bias, thresholds)
+
+    def __call__(self, features: tuple[float, ...]) -> float:
+        z = super().__call__(features)
+        return 1 / (1 + math.exp(-min(max(z, -50), 50)))
+
+
+# fatigue models by name, all scoring the same `KeyboardStats.features()`
+FATIGUE_MODELS: dict[str, LinearModel] = {}
+
+
+def register_model(name: str, model: LinearModel):
+    FATIGUE_MODELS[name] = model
+
+
+# slower, sloppier typing
+register_model(
+    "linear",
+    LinearModel({"flight_z": 1, "hold_z": 1, "backspace_z": 1, "wpm_z": -1}),
+)
+# errors and hesitation before corrections count for more than speed
+register_model(
+    "weighted",
+    LinearModel(
+        {
+            "flight_z": 0.75,
+            "hold_z": 0.75,
+            "backspace_z": 1.5,
+            "pre_correction_z": 0.5,
+            "wpm_z": -0.5,
+        }
+    ),
+)
+# uneven rhythm, the spread of hold and flight times
+register_model(
+    "rhythm",
+    LinearModel(
+        {
+            "flight_z": 0.5,
+            "hold_z": 0.5,
+            "hold_std_z": 1,
+            "flight_std_z": 1,
+            "wpm_z": -0.5,
+        }
+    ),
+)
+register_model(
+    "logistic",
+    LogisticModel(
+        {
+            "flight_z": 0.8,
+            "hold_z": 0.8,
+            "backspace_z": 1.2,
+            "pre_correction_z": 0.4,
+            "flight_std_z": 0.4,
+            "wpm_z": -0.8,
+        },
+        bias=-1.5,
+    ),
+)
@@ -0,0 +1,402 @@
+# breather_core/stats.py
+
+import math
+from collections import deque
+from collections.abc import Hashable
+from itertools import pairwise
+from time import time
+
+from .keys import KeyClass
+from .models import FATIGUE_MODELS
+
+
+DataEvent = tuple[float, float]  # time, data
+
+
+# key, pressed?, time, key class
+class KeyboardEvent:
+    def __init__(
+        self,
+        key: Hashable,
+        pressed: bool,
+        t: float,
+        key_class: KeyClass = KeyClass.OTHER,
+    ):
+        self.key: Hashable = key  # only compared, any id of the key works
+        self.pressed: bool = pressed
+        self.time: float = t
+        self.key_class: KeyClass = key_class
+
+    def __str__(self):
+        return f"Key '{self.key}' {'pressed' if self.pressed else 'released'} at time {self.time}"
+
+    def __repr__(self):
+        return f"KeyboardEvent(key={self.key}, pressed={self.pressed}, time={self.time}, key_class={self.key_class.name})"
+
+
+class RunningStat:
+    __slots__ = ("n", "mu", "M2")
+
+    def __init__(self, pop_mu, pop_var, virtual_n=400):
+        self.n = virtual_n  # population as virtual samples
+        self.mu = pop_mu
+        self.M2 = pop_var * virtual_n  # Σ(x-μ)² from the virtual prior
+
+    def update(self, x: float):
+        self.n += 1
+        delta = x - self.mu
+        self.mu += delta / self.n
+        self.M2 += delta * (x - self.mu)
+
+    def merge(self, other: "RunningStat"):
+        """Combine with a stat over other samples (Chan et al.)."""
+        n = self.n + other.n
+        if not n:
+            return
+        delta = other.mu - self.mu
+        self.mu += delta * other.n / n
+        self.M2 += other.M2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def mean(self):
+        return self.mu
+
+    @property
+    def std(self):
+        return math.sqrt(self.M2 / max(self.n - 1, 1))
+
+
+class DataQueue(deque):
+    def __init__(
+        self,
+        baseline_mu: float | None = None,
+        baseline_var: float | None = None,
+        max_time: float = 30,
+        virtual_n: int = 400,
+        clock=time,
+    ):
+        super().__init__()
+        self.max_time = max_time
+        self.clock = clock  # current time, replays pass their own
+
+        self.has_baseline = baseline_mu is not None
+        if self.has_baseline:
+            self.baseline = RunningStat(baseline_mu, baseline_var, virtual_n)
+
+    def clean(self, t: float):
+        while self and self[0][0] < t - self.max_time:
+            self.popleft()
+
+    def push(self, event: DataEvent):
+        self.clean(event[0])
+        self.append(event)
+        if self.has_baseline:
+            self.baseline.update(event[1])
+
+    def katz_fd(self):
+        """
+        Compute the Katz fractal dimension of the data.
+        Returns NaN for length < 2.
+        """
+        N = len(self)
+        if N < 2:
+            return float("nan")
+
+        # 1) total curve length L
+        L = sum(
+            math.hypot(b[0] - a[0], b[1] - a[1]) for (a, b) in pairwise(self)
+        )
+        # print("length", L)  # DEBUG
+
+        # 2) maximum distance from the first point
+        t0, x0 = self[0]
+        d_max = max(math.hypot(t - t0, x - x0) for t, x in self)
+        # print("max dist", d_max)  # DEBUG
+
+        # 3) Katz dimension
+        # print("len", N)  # DEBUG
+        return math.log(N) / math.log(N * d_max / L)
+
+    def mean(self) -> float:
+        self.clean(self.clock())
+        if not self:
+            return 0
+        return sum(x[1] for x in self) / len(self)
+
+    def var(self) -> float:
+        mean = self.mean()
+        if not self:
+            return 0
+        return sum((x[1] - mean) ** 2 for x in self) / len(self)
+
+    def std(self) -> float:
+        return math.sqrt(self.var())
+
+    def mean_zscore(self) -> float:
+        if not self.has_baseline:
+            raise ValueError("No baseline set")
+        return (self.mean() - self.baseline.mean) / self.baseline.std
+
+    def std_zscore(self) -> float:
+        if not self.has_baseline:
+            raise ValueError("No baseline set")
+        return (self.std() - self.baseline.std) / self.baseline.std
+
+    def zscores(self) -> tuple[float, float]:
+        """`mean_zscore()` and `std_zscore()`, cleaning and averaging once."""
+        if not self.has_baseline:
+            raise ValueError("No baseline set")
+        mean = self.mean()
+        std = (
+            math.sqrt(sum((x[1] - mean) ** 2 for x in self) / len(self))
+            if self
+            else 0
+        )
+        baseline_std = self.baseline.std
+        return (
+            (mean - self.baseline.mean) / baseline_std,
+            (std - baseline_std) / baseline_std,
+        )
+
+
+class KeyStateTracker:
+    """
+    Tracks which keys are down, in front of `KeyboardStats`.
+
+    A press of a key that is already down is an OS auto-repeat and is
+    rejected, so holding a key counts as one keystroke. Keys neither
+    repeated nor released for `stale_after` seconds are expired, and at
+    most `max_keys` keys are tracked at once.
+    """
+
+    def __init__(self, stale_after: float = 10, max_keys: int = 32):
+        self.stale_after = stale_after
+        self.max_keys = max_keys
+        # press events of the keys that are down
+        self.down: dict[Hashable, KeyboardEvent] = {}
+        # when each of them was last pressed or repeated, oldest first
+        self._seen: dict[Hashable, float] = {}
+        self.repeats: int = 0  # auto-repeat presses rejected
+        self.expired: int = 0  # presses dropped without seeing a release
+
+    def press(self, event: KeyboardEvent) -> bool:
+        """Record a press, returns False if it is an auto-repeat."""
+        seen = self._seen
+        if event.key in seen:
+            self.repeats += 1
+            # a key held down keeps repeating, so it is not stale
+            del seen[event.key]
+            seen[event.key] = event.time
+            return False
+
+        # events arrive in time order, so the stale keys are at the front
+        while seen and (
+            len(seen) >= self.max_keys
+            or next(iter(seen.values())) < event.time - self.stale_after
+        ):
+            key = next(iter(seen))
+            del seen[key]
+            del self.down[key]
+            self.expired += 1
+        self.down[event.key] = event
+        seen[event.key] = event.time
+        return True
+
+    def release(self, event: KeyboardEvent) -> KeyboardEvent | None:
+        """Record a release, returns the matching press event if known."""
+        self._seen.pop(event.key, None)
+        return self.down.pop(event.key, None)
+
+
+class KeyboardStats:
+    # population (mean, variance) priors of the per-event metrics
+    PRIORS = {
+        "hold": (0.110, 0.035**2),
+        "backspace": (0.015, 0.010**2),
+        "flight": (0.120, 0.050**2),
+        "pre_correction": (0.180, 0.060**2),
+        "wpm": (70, 20**2),
+    }
+
+    def __init__(
+        self,
+        priors: dict[str, tuple[float, float]] | None = None,
+        virtual_n: int = 400,
+        clock=time,
+    ):
+        priors = {**self.PRIORS, **(priors or {})}
+        self.clock = clock
+        self.num_events: int = 0
+        self.key_state = KeyStateTracker()
+
+        def queue(prior=None):
+            mu, var = priors[prior] if prior else (None, None)
+            return DataQueue(mu, var, virtual_n=virtual_n, clock=clock)
+
+        # times of all key events
+        self.key_times: DataQueue[DataEvent] = queue()
+        # key press times
+        self.press_times: DataQueue[DataEvent] = queue()
+        # key release times
+        self.release_times: DataQueue[DataEvent] = queue()
+        # time between key press and release of the same key
+        self.hold_times: DataQueue[DataEvent] = queue("hold")
+        # backspace key event times (press and release)
+        self.backspace_times: DataQueue[DataEvent] = queue("backspace")
+        # time between key release and next key press
+        self.flight_times: DataQueue[DataEvent] = queue("flight")
+        # time between backspace and previous key event
+        self.pre_correction_times: DataQueue[DataEvent] = queue(
+            "pre_correction"
+        )
+        # time between two key events
+        self.latencies: DataQueue[DataEvent] = queue()
+        self.wpm_baseline = RunningStat(*priors["wpm"], virtual_n)
+
+        # cut-offs, in seconds
+        self.PAUSE_CUTOFF = 5  # gap between presses that restarts wpm
+        self.HOLD_CUTOFF = 0.5  # longer holds are not typing
+        self.FLIGHT_CUTOFF = 1  # longer flights are pauses
+        # presses to wait after a resume before wpm feeds the baseline again
+        self.WPM_WARMUP = 10
+        self._wpm_warmup = 0
+
+        # called as on_metrics(event, hold, flight, latency, backspace) after
+        # each push, with NaN for the metrics the event did not produce
+        self.on_metrics = None
+
+    @property
+    def unreleased(self) -> dict[Hashable, KeyboardEvent]:
+        return self.key_state.down
+
+    def push(self, event: KeyboardEvent):
+        if event.pressed and not self.key_state.press(event):
+            return  # auto-repeat, the key is still held from before
+
+        self.num_events += 1
+        hold_time = flight_time = latency = math.nan
+        is_backspace = False
+        if self.key_times:
+            latency = event.time - self.key_times[-1][0]
+            self.latencies.push((event.time, latency))
+        self.key_times.push((event.time, event.time))
+        if self._wpm_warmup:
+            # the first few presses after a break give a meaningless wpm
+            self._wpm_warmup -= event.pressed
+        else:
+            self.wpm_baseline.update(self.wpm())
+
+        if event.pressed:
+            self.press_times.push((event.time, event.time))
+
+            if (
+                self.release_times
+                and len(self.press_times) > 1
+                and self.release_times[-1][0] > self.press_times[-2][0]
+            ):  # last key event was a release
+                flight_time = event.time - self.release_times[-1][0]
+                if flight_time < self.FLIGHT_CUTOFF:  # not just a long pause
+                    self.flight_times.push((event.time, flight_time))
+                else:
+                    flight_time = math.nan
+
+            if event.key_class == KeyClass.BACKSPACE:
+                is_backspace = True
+                if (
+                    len(self.backspace_times) > 1
+                    and len(self.key_times) > 1
+                    and self.backspace_times[-2][1] == 0
+                ):
+                    pre_correction_time = event.time - self.key_times[-2][0]
+                    self.pre_correction_times.push(
+                        (event.time, pre_correction_time)
+                    )
+                    self.backspace_times.push((event.time, 1))
+                else:
+                    self.backspace_times.push((event.time, 0))
+            else:
+                self.backspace_times.push((event.time, 0))
+        else:
+            self.release_times.push((event.time, event.time))
+
+            press_event = self.key_state.release(event)
+            if press_event:
+                hold_time = event.time - press_event.time
+                # not just holding the key down
+                if hold_time < self.HOLD_CUTOFF:
+                    self.hold_times.push((event.time, hold_time))
+                else:
+                    hold_time = math.nan
+
+        if self.on_metrics is not None:
+            self.on_metrics(
+                event, hold_time, flight_time, latency, is_backspace
+            )
+
+    def resume(self):
+        """Typing resumes after an idle period."""
+        self._wpm_warmup = self.WPM_WARMUP
+
+    def backspace_rate(self) -> float:
+        self.backspace_times.clean(self.clock())
+        if not self.backspace_times:
+            return 0
+        return sum(x[1] for x in self.backspace_times) / len(
+            self.backspace_times
+        )
+
+    def wpm(self) -> float:
+        self.press_times.clean(self.clock())
+        if len(self.press_times) < 2:
+            return 0
+        i_actual = 0
+        for i, (t1, t2) in enumerate(pairwise(self.press_times)):
+            if t2[0] - t1[0] > self.PAUSE_CUTOFF:  # long pause
+                i_actual = i
+
+        if i_actual == 0:
+            res = (
+                len(self.press_times)
+                / (self.press_times[-1][0] - self.press_times[0][0])
+                * 60
+                / 5  # 5 chars per word
+            )
+        else:
+            if len(self.press_times) - i_actual < 2:
+                return 0
+            res = (
+                len(self.press_times)
+                / (self.press_times[-1][0] - self.press_times[i_actual][0])
+                * 60
+                / 5  # 5 chars per word
+            )
+        # print("WPM:", res)  # DEBUG
+        return res
+
+    def wpm_zscore(self) -> float:
+        if not self.press_times:
+            return 0
+        return (self.wpm() - self.wpm_baseline.mean) / self.wpm_baseline.std
+
+    def features(self) -> tuple[float, ...]:
+        """
+        Window features in `FEATURES` order, computed once per tick and
+        shared by all the fatigue models.
+        """
+        hold_z, hold_std_z = self.hold_times.zscores()
+        flight_z, flight_std_z = self.flight_times.zscores()
+        backspace_z, _ = self.backspace_times.zscores()
+        pre_correction_z, _ = self.pre_correction_times.zscores()
+        return (
+            self.wpm_zscore(),
+            hold_z,
+            flight_z,
+            backspace_z,
+            pre_correction_z,
+            hold_std_z,
+            flight_std_z,
+        )
+
+    def fatigue(self, model: str = "linear") -> float:
+        return FATIGUE_MODELS[model](self.features())
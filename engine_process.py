@@ -0,0 +1,227 @@
+# engine_process.py
+#
+# Runs the keyboard hook and the stats engine (FatigueMonitor) in a child
+# process, so their Python work doesn't compete with Qt painting for the
+# GIL and a crash on either side doesn't take down the other. Snapshots
+# cross over through the shared memory block of shm_metrics.py, and the
+# child writes a byte to its stdout after every write to the block, so the
+# tray only wakes up when there is something to read. Commands (screen lock,
+# stop) go down the child's stdin one per line.
+#
+# The tray uses it with BREATHER_ISOLATED=1; it can also run on its own as
+# a headless engine:
+#
+#   python engine_process.py --shm breather-metrics
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+
+from event_bus import EventBus, TICK, LEVEL, IDLE
+from breather_core import FATIGUE_MODELS
+from shm_metrics import ShmReader, DEFAULT_NAME
+
+ENGINE = os.path.abspath(__file__)
+
+
+class RemoteFatigueMonitor:
+    """
+    Stands in for FatigueMonitor in the tray process. A reader thread, blocked
+    on the engine's stdout until it signals a write, turns changes of the
+    shared memory block into TICK, LEVEL and IDLE messages on a local bus;
+    EVENT stays in the engine process. The engine is restarted when it dies.
+    """
+
+    RESTART_DELAY = 1
+
+    def __init__(
+        self, model_name: str = "linear", shm_name: str | None = None
+    ):
+        self.model_name = model_name
+        self.model = FATIGUE_MODELS[model_name]
+        self.shm_name = shm_name or f"breather-engine-{os.getpid()}"
+        self.bus = EventBus()
+
+        # same cadence as the engine's FatigueMonitor
+        self.TICK_INTERVAL = 0.5
+        self.IDLE_AFTER = 60
+
+        self.idle = False
+        self.screen_locked = False
+        self.restarts = 0
+        self._process = None
+        self._reader = None
+        self._last_snapshot = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._spawn()
+        self._thread.start()
+
+    def _spawn(self):
+        self._process = subprocess.Popen(
+            [
+                sys.executable,
+                ENGINE,
+                "--shm",
+                self.shm_name,
+                "--model",
+                self.model_name,
+                "--notify",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        if self.screen_locked:
+            self._send("lock")
+
+    def _send(self, command: str):
+        try:
+            self._process.stdin.write(command.encode() + b"\n")
+            self._process.stdin.flush()
+        except (OSError, ValueError):
+            pass  # the engine is gone, the reader restarts it
+
+    def set_screen_locked(self, locked: bool):
+        self.screen_locked = locked
+        self._send("lock" if locked else "unlock")
+
+    def _run(self):
+        seq = 0
+        while True:
+            # the engine writes a byte after every write to the block,
+            # several may have piled up since the last read
+            try:
+                woken = os.read(self._process.stdout.fileno(), 4096)
+            except OSError:
+                woken = b""
+            if self._stopped.is_set():
+                break
+            if not woken:  # stdout closed, the engine is gone
+                code = self._process.wait()
+                print(f"Stats engine exited ({code}), restarting")
+                # its block may be gone with it, the new engine makes another
+                if self._reader is not None:
+                    self._reader.close()
+                    self._reader = None
+                if self._stopped.wait(self.RESTART_DELAY):
+                    break
+                self._process.stdout.close()
+                self._spawn()
+                self.restarts += 1
+                continue
+
+            if self._reader is None:
+                try:
+                    self._reader = ShmReader(self.shm_name)
+                except (FileNotFoundError, ValueError):
+                    continue  # the engine hasn't created the block yet
+            # a restarted engine attaches to the same block and counts
+            # from zero again, so only compare for equality
+            current = self._reader.sequence
+            if current == seq or current & 1:
+                continue
+            seq = current
+            snapshot = self._reader.read()
+            if snapshot is not None:
+                self._deliver(snapshot)
+
+    def _deliver(self, snapshot):
+        last = self._last_snapshot
+        self._last_snapshot = snapshot
+        if snapshot.idle != self.idle:
+            self.idle = snapshot.idle
+            self.bus.publish(IDLE, (snapshot.idle, snapshot.idle_since))
+        if last is not None and last.time == snapshot.time:
+            return  # only the idle flag was rewritten
+        self.bus.publish(TICK, snapshot)
+        if last is not None and last.level != snapshot.level:
+            self.bus.publish(LEVEL, (last.level, snapshot.level))
+
+    def stop(self):
+        self._stopped.set()
+        self._send("stop")
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self._reader is not None:
+            self._reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run Breather's keyboard hook and stats engine headless"
+    )
+    parser.add_argument("--shm", default=DEFAULT_NAME)
+    parser.add_argument("--model", choices=FATIGUE_MODELS, default="linear")
+    parser.add_argument(
+        "--notify",
+        action="store_true",
+        help="write a byte to stdout after every write to the block",
+    )
+    args = parser.parse_args()
+
+    # the capture side is only needed in the engine process
+    from backend_runner import FatigueMonitor
+    from shm_metrics import ShmPublisher
+
+    # the same opt-ins as the tray, they belong to the capture side
+    exporter = None
+    if os.environ.get("BREATHER_EXPORT_DIR"):
+        from metrics_exporter import MetricsExporter
+
+        exporter = MetricsExporter(
+            os.environ["BREATHER_EXPORT_DIR"],
+            fmt=os.environ.get("BREATHER_EXPORT_FORMAT", "parquet"),
+            model_name=args.model,
+        )
+    recorder = None
+    if os.environ.get("BREATHER_TRACE"):
+        from trace_recorder import TraceRecorder
+
+        recorder = TraceRecorder(os.environ["BREATHER_TRACE"])
+
+    shm = ShmPublisher(args.shm)
+    if args.notify:
+        # stdout is the tray's wakeup pipe, anything printed goes to stderr
+        wakeup = sys.stdout.buffer
+        sys.stdout = sys.stderr
+
+        def notify():
+            try:
+                wakeup.write(b".")
+                wakeup.flush()
+            except (OSError, ValueError):
+                pass  # the tray is gone, stdin closing stops us
+
+        shm.on_write = notify
+
+    monitor = FatigueMonitor(
+        exporter=exporter,
+        recorder=recorder,
+        shm=shm,
+        model_name=args.model,
+    )
+    monitor.start()
+    # stdin closes when the tray exits, even if it never sent "stop"
+    for line in sys.stdin:
+        command = line.strip()
+        if command == "stop":
+            break
+        if command in ("lock", "unlock"):
+            monitor.set_screen_locked(command == "lock")
+    monitor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# event_bus.py
+
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+# topics published by FatigueMonitor
+EVENT = "event"  # every KeyboardEvent, from the listener thread
+TICK = "tick"  # a Snapshot of all the metrics, once per tick
+LEVEL = "level"  # (old level, new level) when the fatigue level changes
+# (idle, since): True when the monitor goes idle, False when typing resumes,
+# and the time that happened (the last keystroke, the screen lock, ...)
+IDLE = "idle"
+
+# what a full subscriber queue does with a new item
+DROP_OLDEST = "drop_oldest"  # keep the newest `maxsize` items
+CONFLATE = "conflate"  # keep only the latest item
+
+
+class Subscription(ABC):
+    """
+    A subscriber's bounded queue. Publishing never blocks: when the queue is
+    full the oldest item is dropped (and counted in `dropped`).
+    """
+
+    def __init__(self, bus, topic: str, maxsize: int, policy: str):
+        if policy not in (DROP_OLDEST, CONFLATE):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.bus = bus
+        self.topic = topic
+        self.dropped = 0
+        self.closed = False
+        self._items = deque(maxlen=1 if policy == CONFLATE else maxsize)
+        self._lock = threading.Lock()
+
+    def _offer(self, item):
+        with self._lock:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._notify()
+
+    @abstractmethod
+    def _notify(self):
+        """Wake the consumer, called with `_lock` held."""
+
+    def close(self):
+        self.bus.unsubscribe(self)
+        with self._lock:
+            self.closed = True
+            self._notify()
+
+
+class CallbackSubscription(Subscription):
+    """Calls `callback(item)` on its own thread, one item at a time."""
+
+    def __init__(self, bus, topic, callback, maxsize, policy):
+        super().__init__(bus, topic, maxsize, policy)
+        self.callback = callback
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _notify(self):
+        self._ready.set()
+
+    def _run(self):
+        while True:
+            self._ready.wait()
+            self._ready.clear()
+            while True:
+                with self._lock:
+                    if self.closed:
+                        return
+                    if not self._items:
+                        break
+                    item = self._items.popleft()
+                try:
+                    self.callback(item)
+                except Exception as e:
+                    print(f"Subscriber to '{self.topic}' failed: {e}")
+
+
+class AsyncSubscription(Subscription):
+    """Async iterator over the items, for use on one asyncio event loop."""
+
+    def __init__(self, bus, topic, loop, maxsize, policy):
+        super().__init__(bus, topic, maxsize, policy)
+        self._loop = loop
+        self._waiter = None
+
+    def _notify(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None:
+            self._loop.call_soon_threadsafe(_wake, waiter)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            with self._lock:
+                if self._items:
+                    return self._items.popleft()
+                if self.closed:
+                    raise StopAsyncIteration
+                self._waiter = waiter = self._loop.create_future()
+            await waiter
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class EventBus:
+    """
+    In-process publish/subscribe. Every subscriber has its own bounded
+    queue, so a slow subscriber only loses its own items and never holds up
+    the publisher.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # copied on write, so publish can iterate without locking
+        self._subscriptions: dict[str, tuple[Subscription, ...]] = {}
+
+    def subscribe(
+        self, topic: str, callback, maxsize: int = 256, policy=DROP_OLDEST
+    ) -> CallbackSubscription:
+        sub = CallbackSubscription(self, topic, callback, maxsize, policy)
+        self._add(sub)
+        return sub
+
+    def stream(
+        self, topic: str, maxsize: int = 256, policy=DROP_OLDEST, loop=None
+    ) -> AsyncSubscription:
+        """
+        `async for item in bus.stream(TICK): ...` on `loop`, by default the
+        running loop.
+        """
+        loop = loop or asyncio.get_running_loop()
+        sub = AsyncSubscription(self, topic, loop, maxsize, policy)
+        self._add(sub)
+        return sub
+
+    def _add(self, sub: Subscription):
+        with self._lock:
+            subs = self._subscriptions.get(sub.topic, ())
+            self._subscriptions[sub.topic] = subs + (sub,)
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subscriptions.get(sub.topic, ())
+            self._subscriptions[sub.topic] = tuple(
+                s for s in subs if s is not sub
+            )
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._subscriptions.get(topic))
+
+    def publish(self, topic: str, item):
+        for sub in self._subscriptions.get(topic, ()):
+            sub._offer(item)
@@ -0,0 +1,207 @@
+# fatigue_chart.py
+
+import math
+from collections import deque
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPixmap, QPainter, QColor, QPen, QFont
+from PySide6.QtCore import Qt
+
+
+class _Series:
+    __slots__ = ("name", "pen", "lo", "hi", "last", "prev")
+
+    def __init__(self, name: str, color: str, width: int):
+        self.name = name
+        self.pen = QPen(QColor(color))
+        self.pen.setWidth(width)
+        self.lo = math.inf  # min of the samples in the current column
+        self.hi = -math.inf  # max of the samples in the current column
+        self.last = math.nan  # last sample seen, carried across columns
+        self.prev = math.nan  # last sample as of the previous column
+
+    def add(self, value: float):
+        if math.isnan(value):
+            return
+        self.lo = min(self.lo, value)
+        self.hi = max(self.hi, value)
+        self.last = value
+
+    def next_column(self):
+        self.lo = math.inf
+        self.hi = -math.inf
+        self.prev = self.last
+
+    def clear(self):
+        self.lo = math.inf
+        self.hi = -math.inf
+        self.last = self.prev = math.nan
+
+
+class FatigueChart(QWidget):
+    """
+    Scrolling chart of the fatigue score and the per-metric z-scores.
+
+    Samples are bucketed into one pixel column per `span / width` seconds,
+    keeping only the min/max of each series per column, and every finished
+    column is painted once into a ring-buffered pixmap. A paint only blits
+    the two halves of the ring, so the cost of an update does not depend on
+    how much history has been shown. The min/max of the last `width`
+    columns are kept, so a resize resamples and repaints them instead of
+    starting over.
+    """
+
+    def __init__(
+        self,
+        span: float = 600,
+        y_min: float = -3.0,
+        y_max: float = 3.0,
+        guides: tuple[float, ...] = (),
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.span = span  # seconds of history across the full width
+        self.y_min = y_min
+        self.y_max = y_max
+        self.guides = guides  # horizontal reference lines, e.g. thresholds
+
+        self._series: list[_Series] = []
+        self._ring = QPixmap()
+        # per finished column, a (lo, hi) per series, (inf, -inf) if empty
+        self._columns = deque(maxlen=1)
+        self._head = 0  # ring column the next finished column is painted in
+        self._col_start: float | None = None  # start time of current column
+        self._col_secs = 1.0  # seconds covered by one column
+
+        self.setMinimumHeight(100)
+
+    def add_series(self, name: str, color: str, width: int = 1):
+        self._series.append(_Series(name, color, width))
+
+    def push(self, t: float, values: dict[str, float]):
+        """Add one sample per series at time `t`."""
+        if self._ring.isNull():
+            self._rebuild()
+        if self._col_start is None:
+            self._col_start = t
+
+        flushed = False
+        if t - self._col_start > self.span:  # long gap, nothing left on screen
+            self._reset()
+            self._col_start = t
+            flushed = True
+        if t >= self._col_start + self._col_secs:
+            painter = QPainter(self._ring)
+            while t >= self._col_start + self._col_secs:
+                self._flush_column(painter)
+                self._col_start += self._col_secs
+            painter.end()
+            flushed = True
+
+        for series in self._series:
+            series.add(values.get(series.name, math.nan))
+
+        if flushed:
+            self.update()
+
+    def _reset(self):
+        self._columns.clear()
+        self._col_start = None
+        for series in self._series:
+            series.clear()
+        self._rebuild()
+
+    def _rebuild(self):
+        """Size the ring to the widget and repaint the kept columns."""
+        width = max(self.width(), 1)
+        height = max(self.height(), 1)
+        old, old_secs = self._columns, self._col_secs
+        self._col_secs = self.span / width
+
+        # resample newest first, merging the old columns each new one covers
+        ratio = old_secs / self._col_secs
+        resampled = []
+        for i, column in enumerate(reversed(old)):
+            first = int(i * ratio)
+            if first >= width:
+                break
+            last = min(max(math.ceil((i + 1) * ratio), first + 1), width)
+            empty = ((math.inf, -math.inf),) * len(column)
+            resampled.extend([empty] * (last - len(resampled)))
+            for j in range(first, last):
+                resampled[j] = tuple(
+                    (min(a_lo, b_lo), max(a_hi, b_hi))
+                    for (a_lo, a_hi), (b_lo, b_hi) in zip(resampled[j], column)
+                )
+        self._columns = deque(reversed(resampled), maxlen=width)
+
+        self._ring = QPixmap(width, height)
+        self._ring.fill(Qt.transparent)
+        painter = QPainter(self._ring)
+        for x, column in enumerate(self._columns):
+            self._paint_column(painter, x, column)
+        painter.end()
+        self._head = len(self._columns) % width
+
+    def _to_y(self, value: float) -> int:
+        h = self._ring.height()
+        frac = (value - self.y_min) / (self.y_max - self.y_min)
+        return round(h - 1 - min(max(frac, 0.0), 1.0) * (h - 1))
+
+    def _flush_column(self, painter: QPainter):
+        column = []
+        for series in self._series:
+            if series.lo > series.hi:  # no samples, hold the last value
+                lo = hi = series.last
+            else:
+                # extend to the previous value so columns join up
+                lo, hi = series.lo, series.hi
+                if not math.isnan(series.prev):
+                    lo = min(lo, series.prev)
+                    hi = max(hi, series.prev)
+            series.next_column()
+            if math.isnan(lo):
+                lo, hi = math.inf, -math.inf
+            column.append((lo, hi))
+        self._columns.append(tuple(column))
+        self._paint_column(painter, self._head, column)
+        self._head = (self._head + 1) % self._ring.width()
+
+    def _paint_column(self, painter: QPainter, x: int, column):
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(x, 0, 1, self._ring.height(), Qt.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+
+        for series, (lo, hi) in zip(self._series, column):
+            if lo > hi:
+                continue
+            painter.setPen(series.pen)
+            painter.drawLine(x, self._to_y(lo), x, self._to_y(hi))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._rebuild()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1b1a3a"))
+
+        if not self._ring.isNull():
+            painter.setPen(QPen(QColor("#3a3960"), 1, Qt.DashLine))
+            for guide in self.guides:
+                y = self._to_y(guide)
+                painter.drawLine(0, y, self.width(), y)
+
+            # oldest columns are at the head, newest just before it
+            w = self._ring.width()
+            h = self._ring.height()
+            painter.drawPixmap(0, 0, self._ring, self._head, 0, w - self._head, h)
+            painter.drawPixmap(w - self._head, 0, self._ring, 0, 0, self._head, h)
+
+        painter.setFont(QFont("DejaVu Sans Mono", 8))
+        x = 4
+        for series in self._series:
+            painter.setPen(series.pen.color())
+            painter.drawText(x, 12, series.name)
+            x += painter.fontMetrics().horizontalAdvance(series.name) + 8
+        painter.end()
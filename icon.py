@@ -20,13 +20,17 @@ from PySide6.QtGui import (
     QCursor,
     QPalette,
 )
-from PySide6.QtCore import QTimer, Qt
+from PySide6.QtCore import QTimer, Qt, QObject, Signal
 from desktop_notifier import DesktopNotifier
 import asyncio
 import threading
-from backend_runner import FatigueMonitor
+from fatigue_chart import FatigueChart
+from breather_core import FEATURES
+from event_bus import IDLE, TICK, CONFLATE
+from break_scheduler import TimerWheel, BreakScheduler
 import time
 import math
+import os
 
 
 # # make sure app shows up in macOS
@@ -57,6 +61,12 @@ loop_thread = threading.Thread(
 loop_thread.start()
 
 
+class MonitorSignals(QObject):
+    # FatigueMonitor callbacks run on its threads, signals queue them to Qt
+    idle_changed = Signal(bool, float)  # idle, since
+    snapshot_ready = Signal(object)
+
+
 def create_tray_app():
     RED_NOTIFY_COOLDOWN = 120        # seconds
     last_red_alert = 0.0 
@@ -71,7 +81,7 @@ def create_tray_app():
     # --- Window setup ---
     stats_window = QWidget()
     stats_window.setWindowTitle("Breather Stats")
-    stats_window.resize(320, 400)
+    stats_window.resize(320, 540)
     stats_window.setStyleSheet(
         """
         QWidget {
@@ -133,6 +143,8 @@ def create_tray_app():
     toggle_glow_action = menu.addAction(
         "Toggle Glow"
     )  # NEW: Toggle Glow button
+    start_break_action = menu.addAction("Start Break")
+    snooze_break_action = menu.addAction("Snooze Break")
     menu.addSeparator()
 
     # low_fatigue_action = menu.addAction("Set Low Fatigue (Green)")
@@ -259,11 +271,48 @@ def create_tray_app():
 
     toggle_glow_action.triggered.connect(toggle_glow)
 
-    fatigue_monitor = FatigueMonitor()
-    fatigue_monitor.start()
+    model_name = os.environ.get("BREATHER_MODEL", "linear")
+    if os.environ.get("BREATHER_ISOLATED"):
+        # keyboard hook and stats in a child process, this one only renders
+        from engine_process import RemoteFatigueMonitor
+
+        fatigue_monitor = RemoteFatigueMonitor(
+            model_name=model_name, shm_name=os.environ.get("BREATHER_SHM")
+        )
+    else:
+        # opt-in columnar export of the keystroke metrics for offline analysis
+        exporter = None
+        if os.environ.get("BREATHER_EXPORT_DIR"):
+            from metrics_exporter import MetricsExporter
+
+            exporter = MetricsExporter(
+                os.environ["BREATHER_EXPORT_DIR"],
+                fmt=os.environ.get("BREATHER_EXPORT_FORMAT", "parquet"),
+                model_name=model_name,
+            )
 
-    fatigue_timer = QTimer()
-    fatigue_timer.setInterval(500)  # .5 seconds
+        # opt-in recording of the raw keystroke timings (key classes only)
+        recorder = None
+        if os.environ.get("BREATHER_TRACE"):
+            from trace_recorder import TraceRecorder
+
+            recorder = TraceRecorder(os.environ["BREATHER_TRACE"])
+
+        # opt-in shared memory block with the latest metrics for other apps
+        shm = None
+        if os.environ.get("BREATHER_SHM"):
+            from shm_metrics import ShmPublisher
+
+            shm = ShmPublisher(os.environ["BREATHER_SHM"])
+
+        from backend_runner import FatigueMonitor
+
+        fatigue_monitor = FatigueMonitor(
+            exporter=exporter,
+            recorder=recorder,
+            shm=shm,
+            model_name=model_name,
+        )
 
     last_level = None
 
@@ -288,41 +337,139 @@ def create_tray_app():
 
     layout.addWidget(divider())
 
-    def update_fatigue_status():
+    # fatigue score and the z-scores feeding it, last 10 minutes
+    fatigue_chart = FatigueChart(
+        span=600, guides=fatigue_monitor.model.thresholds
+    )
+    fatigue_chart.add_series("fatigue", "#d9b2ab", width=2)
+    fatigue_chart.add_series("wpm", "#b2edd2")
+    fatigue_chart.add_series("hold", "#bcccdc")
+    fatigue_chart.add_series("flight", "#8fa8d9")
+    fatigue_chart.add_series("errors", "#e0c97a")
+    layout.addWidget(fatigue_chart)
+
+    # --- Work/break cycles ---
+    suggested_break_label = QLabel(
+        "<b style='color:#d9b2ab'>Break in:</b> – min"
+    )
+    suggested_break_label.setStyleSheet("font-size: 14px; color: #b2edd2;")
+    layout.addWidget(suggested_break_label)
+
+    break_progress = QProgressBar()
+    break_progress.setRange(0, 1000)
+    break_progress.setTextVisible(False)
+    layout.addWidget(break_progress)
+
+    # every deadline lives in the wheel, one single-shot timer wakes for
+    # the earliest of them
+    wheel_timer = QTimer()
+    wheel_timer.setSingleShot(True)
+
+    def arm_wheel():
+        deadline = break_wheel.next_deadline()
+        if deadline is None:
+            wheel_timer.stop()
+        else:
+            wheel_timer.start(max(int((deadline - time.time()) * 1000), 0))
+
+    break_wheel = TimerWheel(on_change=arm_wheel)
+    wheel_timer.timeout.connect(lambda: break_wheel.run_due(time.time()))
+
+    scheduler = BreakScheduler(break_wheel, show_notification)
+    last_break_state = None
+
+    def update_break_progress(now=None):
+        nonlocal last_break_state
+        now = time.time() if now is None else now
+        done, remaining = scheduler.progress(now)
+        break_progress.setValue(int(done * 1000))
+        if scheduler.state == scheduler.WORK:
+            text = "Break in:" if not scheduler.break_due else "Break due!"
+        else:
+            text = "Work resumes in:"
+        suggested_break_label.setText(
+            f"<b style='color:#d9b2ab'>{text}</b> {math.ceil(remaining / 60)} min"
+        )
+        if scheduler.state != last_break_state:
+            last_break_state = scheduler.state
+            chunk, border = (
+                ("#d9b2ab", "#b2edd2")
+                if scheduler.state == scheduler.WORK
+                else ("#b2edd2", "#d9b2ab")
+            )
+            break_progress.setStyleSheet(
+                f"""
+                QProgressBar {{
+                    border: 2px solid {border};
+                    border-radius: 5px;
+                    background-color: #13122b;
+                }}
+                QProgressBar::chunk {{
+                    background-color: {chunk};
+                }}
+            """
+            )
+        # keeps the minutes current between ticks; while idle they don't
+        # change, and the wheel shouldn't wake the GUI for nothing
+        if scheduler.idle:
+            break_wheel.cancel("progress")
+        else:
+            break_wheel.schedule("progress", now + 30, update_break_progress)
+
+    def start_break():
+        scheduler.start_break(time.time())
+        update_break_progress()
+
+    def snooze_break():
+        scheduler.snooze(time.time())
+        update_break_progress()
+
+    start_break_action.triggered.connect(start_break)
+    snooze_break_action.triggered.connect(snooze_break)
+
+    scheduler.start(time.time())
+    update_break_progress()
+
+    # metrics are computed on the monitor's thread, this only displays them
+    def update_fatigue_status(snapshot):
         nonlocal last_level
-        fatigue = fatigue_monitor.get_latest_fatigue()
+        fatigue = snapshot.fatigue
 
-        if fatigue >= 1.25:
-            level = "high"
-            if level != last_level:
+        level = snapshot.level
+        if level != last_level:
+            if level == "high":
                 set_high_fatigue()
-        elif fatigue >= 0.25:
-            level = "medium"
-            if level != last_level:
+            elif level == "medium":
                 set_medium_fatigue()
-        else:
-            level = "low"
-            if level != last_level:
+            else:
                 set_low_fatigue()
 
         last_level = level
 
-        # total_fatigue = fatigue_monitor.get_fatigue_sum()
-        # if total_fatigue > 20:
-        #     show_notification(
-        #         "Consider taking a break!", "Your fatigue is building up!"
-        #     )
-        # print(f"Fatigue: {fatigue:.2f} (Total: {total_fatigue:.2f})")
-
-        wpm       = fatigue_monitor.get_wpm()     
-        wpm_lifetime       = 0 if math.isnan(fatigue_monitor.get_wpm_lifetime()) else fatigue_monitor.get_wpm_lifetime()
-        # print(fatigue_monitor.get_backspace_rate())
-        accuracy  = fatigue_monitor.get_backspace_rate()
-        accuracy_lifetime  = 100 if math.isnan(fatigue_monitor.get_backspace_rate_lifetime()) else fatigue_monitor.get_backspace_rate_lifetime()
-        flight_time  = fatigue_monitor.get_flight_time()
-        flight_time_lifetime  = 0 if math.isnan(fatigue_monitor.get_flight_time_lifetime()) else fatigue_monitor.get_flight_time_lifetime()
-        hold_time  = fatigue_monitor.get_hold_time()
-        hold_time_lifetime  = 0 if math.isnan(fatigue_monitor.get_hold_time_lifetime()) else fatigue_monitor.get_hold_time_lifetime()
+        features = dict(zip(FEATURES, snapshot.features))
+        fatigue_chart.push(
+            snapshot.time,
+            {
+                "fatigue": fatigue,
+                "wpm": features["wpm_z"],
+                "hold": features["hold_z"],
+                "flight": features["flight_z"],
+                "errors": features["backspace_z"],
+            },
+        )
+
+        if not snapshot.idle:
+            scheduler.on_tick(snapshot.time, fatigue)
+        update_break_progress()
+
+        wpm       = snapshot.wpm
+        wpm_lifetime       = 0 if math.isnan(snapshot.wpm_lifetime) else snapshot.wpm_lifetime
+        accuracy  = snapshot.accuracy
+        accuracy_lifetime  = 100 if math.isnan(snapshot.accuracy_lifetime) else snapshot.accuracy_lifetime
+        flight_time  = snapshot.flight_time
+        flight_time_lifetime  = 0 if math.isnan(snapshot.flight_time_lifetime) else snapshot.flight_time_lifetime
+        hold_time  = snapshot.hold_time
+        hold_time_lifetime  = 0 if math.isnan(snapshot.hold_time_lifetime) else snapshot.hold_time_lifetime
 
         stat_labels["wpm"].setText(
             f"<b style='color:#d9b2ab'>Typing speed (last 30 seconds):</b> {wpm:.1f} words/min"
@@ -351,8 +498,28 @@ def create_tray_app():
         )
 
 
-    fatigue_timer.timeout.connect(update_fatigue_status)
-    fatigue_timer.start()
+    # while idle nothing changes, so stop glowing until a keystroke
+    def on_idle_changed(idle, since):
+        # since the last keystroke or the screen lock, not when it was noticed
+        scheduler.on_idle(idle, since)
+        update_break_progress()
+        if idle:
+            timer.stop()
+            tray.setIcon(QIcon(base_pixmap))
+        elif is_glowing:
+            timer.start({"medium": 100, "high": 50}.get(last_level, 200))
+
+    monitor_signals = MonitorSignals()
+    monitor_signals.idle_changed.connect(on_idle_changed)
+    monitor_signals.snapshot_ready.connect(update_fatigue_status)
+    fatigue_monitor.bus.subscribe(
+        IDLE, lambda change: monitor_signals.idle_changed.emit(*change)
+    )
+    # only the latest snapshot matters if the GUI falls behind
+    fatigue_monitor.bus.subscribe(
+        TICK, monitor_signals.snapshot_ready.emit, policy=CONFLATE
+    )
+    fatigue_monitor.start()
 
 
     
@@ -361,202 +528,8 @@ def create_tray_app():
     # typing_mood_label.setStyleSheet("font-size: 14px; color: #b2edd2;")
     # layout.addWidget(typing_mood_label)
 
-    # suggested_break_label = QLabel(
-    #     "<b style='color:#d9b2ab'>Break in:</b> 10 min"
-    # )
-    # suggested_break_label.setStyleSheet("font-size: 14px; color: #b2edd2;")
-    # layout.addWidget(suggested_break_label)
-
     stats_window.setLayout(layout)
 
-    # break_progress = QProgressBar()
-    # break_progress.setRange(0, 20)  # 600 seconds = 10 minutes
-    # break_progress.setValue(0)
-    # break_progress.setStyleSheet(
-    #     """
-    #     QProgressBar {
-    #         border: 2px solid #b2edd2;
-    #         border-radius: 5px;
-    #         background-color: #13122b;
-    #         text-align: center;
-    #         color: #ffffff;
-    #         font-weight: bold;
-    #     }
-    #     QProgressBar::chunk {
-    #         background-color: #d9b2ab;
-    #     }
-    # """
-    # )
-    # layout.addWidget(break_progress)
-
-    # FUTURE PROGRESS: PROGRESS BAR FOR WORK/BREAK
-
-    # break_time_seconds = 20  # 10 minutes
-    # elapsed_seconds = 0
-
-    # progress_timer = QTimer()
-    # progress_timer.setInterval(1000)  # 1 second
-    # progress_timer.start()
-
-    # is_work_mode = True
-    # work_time_seconds = 20  # (example) 10 minutes work
-    # break_time_seconds = 10  # (example) 5 minutes break
-    # current_cycle_seconds = work_time_seconds
-
-    # def update_break_progress():
-    #     nonlocal elapsed_seconds, is_work_mode, current_cycle_seconds
-    #     elapsed_seconds += 1
-    #     break_progress.setValue(elapsed_seconds)
-
-    #     minutes_remaining = max(
-    #         (current_cycle_seconds - elapsed_seconds) // 60, 0
-    #     )
-    #     if is_work_mode:
-    #         suggested_break_label.setText(
-    #             f"<b style='color:#d9b2ab'>Break in:</b> {minutes_remaining} min"
-    #         )
-    #     else:
-    #         suggested_break_label.setText(
-    #             f"<b style='color:#d9b2ab'>Work resumes in:</b> {minutes_remaining} min"
-    #         )
-
-    #     if elapsed_seconds >= current_cycle_seconds:
-    #         elapsed_seconds = 0
-    #         if is_work_mode:
-    #             # Finished work session
-    #             elapsed_seconds = 0
-    #             # Ask the user if they want to start break
-
-    #             msg_box = QMessageBox(stats_window)
-    #             msg_box.setWindowTitle("Start Break?")
-    #             msg_box.setText(
-    #                 "You've finished your work session!\nStart your break now?"
-    #             )
-    #             msg_box.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
-
-    #             # Full style sheet for entire QMessageBox (background, button)
-    #             msg_box.setStyleSheet(
-    #                 """
-    #                 QMessageBox {
-    #                     background-color: #13122b;
-    #                 }
-    #                 QLabel {
-    #                     color: #b2edd2;
-    #                     font-size: 14px;
-    #                     font-family: 'DejaVu Sans Mono';
-    #                 }
-    #                 QPushButton {
-    #                     background-color: #d9b2ab;
-    #                     color: #13122b;
-    #                     padding: 6px 12px;
-    #                     border-radius: 6px;
-    #                     font-weight: bold;
-    #                 }
-    #                 QPushButton:hover {
-    #                     background-color: #b2edd2;
-    #                     color: #13122b;
-    #                 }
-    #             """
-    #             )
-
-    #             reply = msg_box.exec()
-
-    #             if reply == QMessageBox.Yes:
-    #                 is_work_mode = False
-    #                 current_cycle_seconds = break_time_seconds
-    #                 break_progress.setRange(0, current_cycle_seconds)
-    #                 break_progress.setValue(0)
-    #                 break_progress.setStyleSheet(
-    #                     """
-    #                     QProgressBar {
-    #                         border: 2px solid #d9b2ab;
-    #                         border-radius: 5px;
-    #                         background-color: #13122b;
-    #                         text-align: center;
-    #                         color: #ffffff;
-    #                         font-weight: bold;
-    #                     }
-    #                     QProgressBar::chunk {
-    #                         background-color: #b2edd2;
-    #                     }
-    #                 """
-    #                 )
-    #                 show_notification(
-    #                     "Break Time!", "Relax and breathe for a bit!"
-    #                 )
-    #             else:
-    #                 # If user says No, reset to new work session
-    #                 is_work_mode = True
-    #                 current_cycle_seconds = work_time_seconds
-    #                 break_progress.setRange(0, current_cycle_seconds)
-    #                 break_progress.setValue(0)
-    #         else:
-    #             # Switching to Break Mode
-    #             msg_box = QMessageBox(stats_window)
-    #             msg_box.setWindowTitle("End Break?")
-    #             msg_box.setText("Break's over! Ready to work again?")
-    #             msg_box.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
-
-    #             # Full style sheet for entire QMessageBox (background, button)
-    #             msg_box.setStyleSheet(
-    #                 """
-    #                 QMessageBox {
-    #                     background-color: #13122b;
-    #                 }
-    #                 QLabel {
-    #                     color: #b2edd2;
-    #                     font-size: 14px;
-    #                     font-family: 'DejaVu Sans Mono';
-    #                 }
-    #                 QPushButton {
-    #                     background-color: #d9b2ab;
-    #                     color: #13122b;
-    #                     padding: 6px 12px;
-    #                     border-radius: 6px;
-    #                     font-weight: bold;
-    #                 }
-    #                 QPushButton:hover {
-    #                     background-color: #b2edd2;
-    #                     color: #13122b;
-    #                 }
-    #             """
-    #             )
-
-    #             reply = msg_box.exec()
-
-    #             if reply == QMessageBox.Yes:
-    #                 is_work_mode = True
-    #                 current_cycle_seconds = work_time_seconds
-    #                 break_progress.setRange(0, current_cycle_seconds)
-    #                 break_progress.setValue(0)
-    #                 break_progress.setStyleSheet(
-    #                     """
-    #                     QProgressBar {
-    #                         border: 2px solid #d9b2ab;
-    #                         border-radius: 5px;
-    #                         background-color: #13122b;
-    #                         text-align: center;
-    #                         color: #ffffff;
-    #                         font-weight: bold;
-    #                     }
-    #                     QProgressBar::chunk {
-    #                         background-color: #b2edd2;
-    #                     }
-    #                 """
-    #                 )
-    #                 show_notification("Work Time!", "Time to grind!")
-    #             else:
-    #                 # If user says No, reset to new work session
-    #                 is_work_mode = False
-    #                 current_cycle_seconds = break_time_seconds
-    #                 break_progress.setRange(0, current_cycle_seconds)
-    #                 break_progress.setValue(0)
-
-    #         break_progress.setRange(0, current_cycle_seconds)
-    #         break_progress.setValue(0)
-
-    # progress_timer.timeout.connect(update_break_progress)
-
     def quit_app():
         fatigue_monitor.stop()
         app.quit()
@@ -0,0 +1,178 @@
+# metrics_exporter.py
+
+import os
+import queue
+import threading
+from datetime import datetime
+
+from breather_core import FATIGUE_MODELS
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # export is optional, the tray runs without pyarrow
+    pa = None
+
+
+if pa is not None:
+    EVENT_SCHEMA = pa.schema(
+        [
+            ("time", pa.float64()),
+            ("pressed", pa.bool_()),
+            ("hold", pa.float64()),  # NaN unless a release closed a hold
+            ("flight", pa.float64()),  # NaN unless a press followed a release
+            ("latency", pa.float64()),  # time since the previous key event
+            ("backspace", pa.bool_()),
+        ]
+    )
+    TICK_SCHEMA = pa.schema(
+        [
+            ("time", pa.float64()),
+            ("fatigue", pa.float64()),
+            ("wpm", pa.float64()),
+            ("accuracy", pa.float64()),  # percent, as shown in the tray
+        ]
+        # every registered model's score, to compare them on the same ticks
+        + [(f"score_{name}", pa.float64()) for name in FATIGUE_MODELS]
+    )
+
+
+class _ColumnBuffer:
+    """Column lists for one schema, filled by a single producer thread."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.lock = threading.Lock()
+        self.columns = {name: [] for name in schema.names}
+        self.rows = 0
+
+    def append(self, row: tuple) -> int:
+        """Add a row, returns the number of buffered rows."""
+        with self.lock:
+            for column, value in zip(self.columns.values(), row):
+                column.append(value)
+            self.rows += 1
+            return self.rows
+
+    def take(self):
+        """Swap out the buffered rows as a record batch (or None)."""
+        with self.lock:
+            if not self.rows:
+                return None
+            columns = self.columns
+            self.columns = {name: [] for name in self.schema.names}
+            self.rows = 0
+        return pa.RecordBatch.from_pydict(columns, schema=self.schema)
+
+
+class MetricsExporter:
+    """
+    Streams per-event keystroke metrics and per-tick fatigue scores to
+    columnar files.
+
+    Producers only append to column lists; a background thread turns them
+    into Arrow record batches and writes each batch as one row group. Files
+    are rolled per day as `<kind>-<date>-<start time>.<ext>`, so a run of
+    the tray never appends to a file written by an earlier one. Tick files
+    record the model that produced their `fatigue` column in the schema
+    metadata (`model`).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fmt: str = "parquet",
+        model_name: str = "linear",
+        row_group_size: int = 4096,
+        flush_interval: float = 60,
+    ):
+        if pa is None:
+            raise RuntimeError("Metrics export requires pyarrow")
+        if fmt not in ("parquet", "feather"):
+            raise ValueError(f"Unknown export format: {fmt}")
+
+        self.directory = directory
+        self.fmt = fmt
+        self.row_group_size = row_group_size
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._buffers = {
+            "events": _ColumnBuffer(EVENT_SCHEMA),
+            "ticks": _ColumnBuffer(
+                TICK_SCHEMA.with_metadata({"model": model_name})
+            ),
+        }
+        self._writers = {}  # kind -> (date, writer)
+        self._pending = queue.SimpleQueue()  # kinds that have a full buffer
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record_event(self, event, hold, flight, latency, backspace):
+        """`KeyboardStats.on_metrics` callback, runs on the listener thread."""
+        row = (event.time, event.pressed, hold, flight, latency, backspace)
+        if self._buffers["events"].append(row) == self.row_group_size:
+            self._pending.put("events")
+
+    def record_snapshot(self, snapshot):
+        """Subscriber to the monitor's TICK snapshots."""
+        row = (
+            snapshot.time,
+            snapshot.fatigue,
+            snapshot.wpm,
+            snapshot.accuracy,
+            *snapshot.scores,
+        )
+        if self._buffers["ticks"].append(row) == self.row_group_size:
+            self._pending.put("ticks")
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                kinds = [self._pending.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                kinds = list(self._buffers)
+            for kind in kinds:
+                if kind is not None:  # None only wakes us up to close
+                    self._flush(kind)
+        for kind in self._buffers:
+            self._flush(kind)
+        for _, writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def _flush(self, kind: str):
+        batch = self._buffers[kind].take()
+        if batch is None:
+            return
+        try:
+            self._writer(kind).write_batch(batch)
+        except OSError as e:
+            print(f"Metrics export failed: {e}")
+
+    def _writer(self, kind: str):
+        today = datetime.now().date()
+        current = self._writers.get(kind)
+        if current is not None and current[0] == today:
+            return current[1]
+        if current is not None:
+            current[1].close()
+
+        stamp = datetime.now().strftime("%Y-%m-%d-%H%M%S")
+        ext = "parquet" if self.fmt == "parquet" else "feather"
+        path = os.path.join(self.directory, f"{kind}-{stamp}.{ext}")
+        schema = self._buffers[kind].schema
+        if self.fmt == "parquet":
+            writer = pq.ParquetWriter(path, schema)
+        else:
+            writer = pa.ipc.new_file(path, schema)  # Feather v2
+        self._writers[kind] = (today, writer)
+        return writer
+
+    def close(self):
+        """Flush everything that is buffered and close the files."""
+        self._closed.set()
+        self._pending.put(None)
+        self._thread.join()
@@ -0,0 +1,330 @@
+# report.py
+#
+# Daily and weekly summaries of the metrics written by MetricsExporter
+# (BREATHER_EXPORT_DIR). Files are streamed batch by batch, so memory stays
+# constant however much history there is, and can be summarized on a
+# process pool, one file at a time.
+#
+#   python report.py ~/breather-metrics
+#   python report.py ~/breather-metrics --since 2026-09-01 --weekly \
+#       --processes 4 --format csv
+
+import argparse
+import csv
+import math
+import multiprocessing
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+from breather_core import RunningStat, FATIGUE_MODELS
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+# same cadence and cool-down as the tray
+TICK_INTERVAL = 0.5
+ALERT_COOLDOWN = 120
+
+LEVELS = ("low", "medium", "high")
+
+
+def _stat() -> RunningStat:
+    return RunningStat(0.0, 0.0, virtual_n=0)  # exact, no prior
+
+
+class Summary:
+    """Mergeable statistics over any number of tick and event rows."""
+
+    __slots__ = (
+        "ticks",
+        "level_ticks",
+        "alerts",
+        "fatigue",
+        "wpm",
+        "accuracy",
+        "presses",
+        "backspaces",
+        "hold",
+        "flight",
+    )
+
+    def __init__(self):
+        self.ticks = 0
+        self.level_ticks = [0, 0, 0]
+        self.alerts = 0
+        self.fatigue = _stat()
+        self.wpm = _stat()
+        self.accuracy = _stat()
+        self.presses = 0
+        self.backspaces = 0
+        self.hold = _stat()
+        self.flight = _stat()
+
+    def merge(self, other: "Summary"):
+        self.ticks += other.ticks
+        self.level_ticks = [
+            a + b for a, b in zip(self.level_ticks, other.level_ticks)
+        ]
+        self.alerts += other.alerts
+        self.presses += other.presses
+        self.backspaces += other.backspaces
+        for name in ("fatigue", "wpm", "accuracy", "hold", "flight"):
+            getattr(self, name).merge(getattr(other, name))
+
+    def row(self) -> dict:
+        def mean(stat, scale=1):
+            return round(stat.mean * scale, 3) if stat.n else float("nan")
+
+        active = self.ticks * TICK_INTERVAL
+        return {
+            "active_hours": round(active / 3600, 2),
+            "wpm": mean(self.wpm),
+            "accuracy": mean(self.accuracy),
+            "hold_ms": mean(self.hold, 1000),
+            "hold_sd_ms": round(self.hold.std * 1000, 3),
+            "flight_ms": mean(self.flight, 1000),
+            "flight_sd_ms": round(self.flight.std * 1000, 3),
+            "presses": self.presses,
+            "backspaces": self.backspaces,
+            "fatigue": mean(self.fatigue),
+            **{
+                f"{level}_hours": round(n * TICK_INTERVAL / 3600, 2)
+                for level, n in zip(LEVELS, self.level_ticks)
+            },
+            "alerts": self.alerts,
+        }
+
+
+# --- Streaming ---
+
+
+def read_batches(path: str, columns: list[str], batch_size: int):
+    if path.endswith(".parquet"):
+        yield from pq.ParquetFile(path).iter_batches(
+            batch_size=batch_size, columns=columns
+        )
+    else:  # Feather v2, one batch per exporter row group
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).select(columns)
+
+
+def tick_model(path: str, default: str) -> str:
+    """The model that scored a ticks file, from its schema metadata."""
+    if path.endswith(".parquet"):
+        metadata = pq.read_schema(path).metadata
+    else:
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata
+    name = (metadata or {}).get(b"model")
+    if name is None:  # exported before the model was recorded
+        return default
+    name = name.decode()
+    if name not in FATIGUE_MODELS:
+        print(
+            f"{path}: unknown model {name}, using {default}'s thresholds",
+            file=sys.stderr,
+        )
+        return default
+    return name
+
+
+def read_rows(path: str, columns: list[str], batch_size: int):
+    for batch in read_batches(path, columns, batch_size):
+        yield from zip(*(batch.column(c).to_pylist() for c in columns))
+
+
+def by_day(rows):
+    """Tags time-ordered rows with their local date."""
+    day = None
+    start = end = 0.0
+    for row in rows:
+        t = row[0]
+        if not start <= t < end:
+            day = date.fromtimestamp(t)
+            start = datetime(day.year, day.month, day.day).timestamp()
+            end = (
+                datetime(day.year, day.month, day.day) + timedelta(days=1)
+            ).timestamp()
+        yield day, row
+
+
+def summarize_ticks(rows, thresholds, days: dict):
+    medium, high = thresholds
+    summary = None
+    last_day = None
+    last_level = None
+    last_alert = -math.inf
+    for day, (t, fatigue, wpm, accuracy) in by_day(rows):
+        if day != last_day:
+            summary = days.setdefault(day, Summary())
+            last_day = day
+        level = 2 if fatigue >= high else 1 if fatigue >= medium else 0
+        if level == 2 and last_level != 2:
+            if t - last_alert >= ALERT_COOLDOWN:
+                summary.alerts += 1
+                last_alert = t
+        last_level = level
+        summary.ticks += 1
+        summary.level_ticks[level] += 1
+        summary.fatigue.update(fatigue)
+        if wpm > 0:  # fewer than two presses in the window
+            summary.wpm.update(wpm)
+        summary.accuracy.update(accuracy)
+
+
+def summarize_events(rows, days: dict):
+    summary = None
+    last_day = None
+    for day, (t, pressed, hold, flight, backspace) in by_day(rows):
+        if day != last_day:
+            summary = days.setdefault(day, Summary())
+            last_day = day
+        if pressed:
+            summary.presses += 1
+            summary.backspaces += backspace
+        if hold == hold:  # NaN unless the row closed a hold
+            summary.hold.update(hold)
+        if flight == flight:
+            summary.flight.update(flight)
+
+
+def summarize_file(job) -> dict[date, Summary]:
+    path, default_model, batch_size = job
+    days = {}
+    if os.path.basename(path).startswith("ticks-"):
+        model = FATIGUE_MODELS[tick_model(path, default_model)]
+        columns = ["time", "fatigue", "wpm", "accuracy"]
+        rows = read_rows(path, columns, batch_size)
+        summarize_ticks(rows, model.thresholds, days)
+    else:
+        columns = ["time", "pressed", "hold", "flight", "backspace"]
+        summarize_events(read_rows(path, columns, batch_size), days)
+    return days
+
+
+# --- Command line ---
+
+
+def file_date(path: str) -> date | None:
+    """The date in `<kind>-<YYYY-MM-DD>-<HHMMSS>.<ext>`."""
+    try:
+        stamp = os.path.basename(path).split("-", 1)[1]
+        return date.fromisoformat(stamp[:10])
+    except (IndexError, ValueError):
+        return None
+
+
+def find_files(paths, since: date | None, until: date | None):
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.listdir(path))
+            files = [os.path.join(path, name) for name in names]
+        else:
+            files = [path]
+        for file in files:
+            name = os.path.basename(file)
+            if not name.startswith(("ticks-", "events-")):
+                continue
+            if not name.endswith((".parquet", ".feather")):
+                continue
+            # rows buffered before midnight can land in the next day's file
+            d = file_date(file)
+            if d is not None:
+                if since and d < since:
+                    continue
+                if until and d > until + timedelta(days=1):
+                    continue
+            yield file
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize exported Breather metrics by day and week"
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="export directories or ticks-/events- files"
+    )
+    parser.add_argument("--since", type=date.fromisoformat)
+    parser.add_argument("--until", type=date.fromisoformat)
+    parser.add_argument(
+        "--weekly", action="store_true", help="one row per ISO week"
+    )
+    parser.add_argument(
+        "--model",
+        choices=FATIGUE_MODELS,
+        default="linear",
+        help="whose thresholds define the fatigue levels in tick files "
+        "that don't record the model that scored them",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="summarize files on a process pool of this size",
+    )
+    parser.add_argument("--batch-size", type=int, default=65536)
+    parser.add_argument("--format", choices=("text", "csv"), default="text")
+    args = parser.parse_args()
+
+    if pa is None:
+        sys.exit("report.py requires pyarrow")
+
+    jobs = [
+        (path, args.model, args.batch_size)
+        for path in find_files(args.paths, args.since, args.until)
+    ]
+    if not jobs:
+        sys.exit("no exported metrics found")
+
+    days = {}
+
+    def collect(results):
+        for file_days in results:
+            for day, summary in file_days.items():
+                if args.since and day < args.since:
+                    continue
+                if args.until and day > args.until:
+                    continue
+                days.setdefault(day, Summary()).merge(summary)
+
+    if args.processes > 1:
+        with multiprocessing.Pool(args.processes) as pool:
+            collect(pool.imap_unordered(summarize_file, jobs))
+    else:
+        collect(map(summarize_file, jobs))
+
+    periods = {}
+    for day in sorted(days):
+        if args.weekly:
+            year, week, _ = day.isocalendar()
+            key = f"{year}-W{week:02d}"
+        else:
+            key = day.isoformat()
+        periods.setdefault(key, Summary()).merge(days[day])
+
+    rows = [{"period": key, **s.row()} for key, s in periods.items()]
+    if args.format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+
+    columns = list(rows[0])
+    widths = [
+        max(len(c), *(len(str(row[c])) for row in rows)) for c in columns
+    ]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[c]).rjust(w) for c, w in zip(columns, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# shm_metrics.py
+#
+# The latest metric snapshot in a fixed-layout shared memory block, so local
+# processes (status bars, a headless monitor, tests) can read it without
+# sockets or serialization. The writer is FatigueMonitor (through
+# ShmPublisher), readers use ShmReader or run this file:
+#
+#   python shm_metrics.py --format "{level} {fatigue:.2f}"
+#   python shm_metrics.py --format "{score_linear:.2f} {score_logistic:.2f}"
+
+import argparse
+import os
+import struct
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from time import sleep
+from typing import NamedTuple
+
+from breather_core import FATIGUE_MODELS
+
+DEFAULT_NAME = "breather-metrics"
+MAGIC = b"BRSM"
+LAYOUT_VERSION = 4
+MAX_FEATURES = 16
+MAX_MODELS = 8
+
+# magic, layout version, sequence number (odd while a write is in progress),
+# pid of the writer
+HEADER = struct.Struct("<4sIQQ")
+SEQ = struct.Struct("<Q")
+SEQ_OFFSET = 8
+# time, fatigue, level, idle, when idle last changed, the eight tray metrics,
+# feature count, features, model count, the scores of the models in
+# FATIGUE_MODELS order
+PAYLOAD = struct.Struct(f"<ddBB6xd8dI4x{MAX_FEATURES}dI4x{MAX_MODELS}d")
+SIZE = HEADER.size + PAYLOAD.size
+
+LEVELS = ("low", "medium", "high")
+
+
+class SharedSnapshot(NamedTuple):
+    """Same fields as backend_runner.Snapshot, plus when `idle` changed."""
+
+    time: float
+    fatigue: float
+    level: str
+    idle: bool
+    wpm: float
+    wpm_lifetime: float
+    accuracy: float
+    accuracy_lifetime: float
+    flight_time: float
+    flight_time_lifetime: float
+    hold_time: float
+    hold_time_lifetime: float
+    features: tuple[float, ...]
+    scores: tuple[float, ...]
+    idle_since: float
+
+
+def _alive(pid: int) -> bool:
+    if sys.platform == "win32":
+        return True  # blocks go away with their last handle, so it's live
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ShmPublisher:
+    """
+    Writes snapshots under a seqlock: the sequence number is made odd,
+    the payload written, and the number made even again, so a reader that
+    sees the same even number before and after reading has a consistent copy.
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME):
+        try:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        except FileExistsError:
+            self._shm = self._reclaim(name)
+        self._buf = self._shm.buf
+        self._seq = 0
+        self._last = None
+        self._idle_since = 0.0
+        self._lock = threading.Lock()  # one writer at a time
+        # called after every write, e.g. to wake a reader blocked elsewhere
+        self.on_write = None
+        HEADER.pack_into(
+            self._buf, 0, MAGIC, LAYOUT_VERSION, self._seq, os.getpid()
+        )
+
+    @staticmethod
+    def _reclaim(name: str) -> shared_memory.SharedMemory:
+        """
+        Take over a block left behind by a crashed run. One that another
+        process still writes is refused, one of another size or layout is
+        replaced.
+        """
+        shm = shared_memory.SharedMemory(name)
+        if shm.size >= SIZE:
+            magic, version, _, pid = HEADER.unpack_from(shm.buf, 0)
+            if magic == MAGIC and version == LAYOUT_VERSION:
+                if _alive(pid):
+                    shm.close()
+                    raise RuntimeError(f"{name} is in use by process {pid}")
+                return shm
+        shm.close()
+        shm.unlink()
+        return shared_memory.SharedMemory(name, create=True, size=SIZE)
+
+    def publish(self, snapshot):
+        """Subscriber to the monitor's TICK snapshots."""
+        with self._lock:
+            self._write(snapshot)
+            if self.on_write is not None:
+                self.on_write()
+
+    def _write(self, snapshot):
+        self._last = snapshot
+        features = snapshot.features[:MAX_FEATURES]
+        scores = snapshot.scores[:MAX_MODELS]
+        self._seq += 1
+        SEQ.pack_into(self._buf, SEQ_OFFSET, self._seq)
+        PAYLOAD.pack_into(
+            self._buf,
+            HEADER.size,
+            snapshot.time,
+            snapshot.fatigue,
+            LEVELS.index(snapshot.level),
+            snapshot.idle,
+            self._idle_since,
+            snapshot.wpm,
+            snapshot.wpm_lifetime,
+            snapshot.accuracy,
+            snapshot.accuracy_lifetime,
+            snapshot.flight_time,
+            snapshot.flight_time_lifetime,
+            snapshot.hold_time,
+            snapshot.hold_time_lifetime,
+            len(features),
+            *features,
+            *(0.0,) * (MAX_FEATURES - len(features)),
+            len(scores),
+            *scores,
+            *(0.0,) * (MAX_MODELS - len(scores)),
+        )
+        self._seq += 1
+        SEQ.pack_into(self._buf, SEQ_OFFSET, self._seq)
+
+    def set_idle(self, change: tuple[bool, float]):
+        """Subscriber to the monitor's IDLE changes."""
+        idle, since = change
+        with self._lock:
+            self._idle_since = since
+            if self._last is not None:
+                self._write(self._last._replace(idle=idle))
+                if self.on_write is not None:
+                    self.on_write()
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+class ShmReader:
+    def __init__(self, name: str = DEFAULT_NAME):
+        self._shm = shared_memory.SharedMemory(name)
+        # only the publisher may unlink the block when we exit
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+        self._buf = self._shm.buf
+        magic, version, _, _ = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            raise ValueError(f"{name} is not a Breather metrics block")
+
+    @property
+    def sequence(self) -> int:
+        """Changes on every write, cheap to poll before a full read()."""
+        return SEQ.unpack_from(self._buf, SEQ_OFFSET)[0]
+
+    def read(self) -> SharedSnapshot | None:
+        """The latest snapshot, or None if nothing was published yet."""
+        spins = 0
+        while True:
+            (before,) = SEQ.unpack_from(self._buf, SEQ_OFFSET)
+            if not before & 1:
+                values = PAYLOAD.unpack_from(self._buf, HEADER.size)
+                (after,) = SEQ.unpack_from(self._buf, SEQ_OFFSET)
+                if before == after:
+                    break
+            spins += 1
+            if spins > 100:  # writer preempted mid-write, let it finish
+                sleep(0.0001)
+        if before == 0:
+            return None
+        n_features = values[13]
+        scores_at = 15 + MAX_FEATURES
+        n_scores = values[scores_at - 1]
+        return SharedSnapshot(
+            values[0],
+            values[1],
+            LEVELS[values[2]],
+            bool(values[3]),
+            *values[5:13],
+            features=values[14 : 14 + n_features],
+            scores=values[scores_at : scores_at + n_scores],
+            idle_since=values[4],
+        )
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print Breather's latest metrics from shared memory"
+    )
+    parser.add_argument("--name", default=DEFAULT_NAME)
+    parser.add_argument(
+        "--format",
+        default="{level} {fatigue:.2f} {wpm:.0f}wpm",
+        help="str.format template over the snapshot fields and the scores "
+        "of each model as score_<model>",
+    )
+    args = parser.parse_args()
+
+    try:
+        reader = ShmReader(args.name)
+    except FileNotFoundError:
+        print("Breather is not running", file=sys.stderr)
+        sys.exit(1)
+    snapshot = reader.read()
+    reader.close()
+    if snapshot is None:
+        sys.exit(1)
+    fields = snapshot._asdict()
+    for name, score in zip(FATIGUE_MODELS, snapshot.scores):
+        fields[f"score_{name}"] = score
+    print(args.format.format(**fields))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# soak.py
+#
+# Long-running load test of FatigueMonitor: drives synthetic key events
+# through the real ingest path (FatigueMonitor.ingest, without the keyboard
+# hook or pynput) while the monitor thread ticks, and fails when memory,
+# window sizes or ingest latency go over budget.
+#
+#   python soak.py --pattern typing --rate 10 --duration 4h
+#   python soak.py --pattern scanner --rate 3000 --duration 10m
+
+import argparse
+import os
+import random
+import sys
+import threading
+from itertools import count
+from time import perf_counter, sleep, time
+
+from backend_runner import FatigueMonitor
+from breather_core import DataQueue, KeyClass
+
+
+# keys are (name, class) pairs, the name tells them apart
+LETTERS = [(c, KeyClass.LETTER) for c in "abcdefghijklmnopqrstuvwxyz"]
+DIGITS = [(c, KeyClass.DIGIT) for c in "0123456789"]
+BACKSPACE = ("backspace", KeyClass.BACKSPACE)
+ENTER = ("enter", KeyClass.ENTER)
+
+
+# --- Event patterns, each an endless stream of (key, pressed) ---
+
+
+def typing_pattern(rng):
+    """Ordinary typing with some rollover and corrections."""
+    while True:
+        key = BACKSPACE if rng.random() < 0.05 else rng.choice(LETTERS)
+        if rng.random() < 0.2:  # press the next key before releasing
+            other = rng.choice(LETTERS)
+            if other != key:
+                yield key, True
+                yield other, True
+                yield key, False
+                yield other, False
+                continue
+        yield key, True
+        yield key, False
+
+
+def repeat_pattern(rng):
+    """A key held down, the OS firing auto-repeat presses."""
+    while True:
+        key = rng.choice(LETTERS)
+        for _ in range(rng.randint(20, 500)):
+            yield key, True
+        yield key, False
+
+
+def macro_pattern(rng):
+    """A macro tool replaying the same short sequence over and over."""
+    macro = [rng.choice(LETTERS) for _ in range(12)]
+    while True:
+        for key in macro:
+            yield key, True
+            yield key, False
+
+
+def scanner_pattern(rng):
+    """A barcode scanner typing digit strings terminated by enter."""
+    while True:
+        for _ in range(13):
+            key = rng.choice(DIGITS)
+            yield key, True
+            yield key, False
+        yield ENTER, True
+        yield ENTER, False
+
+
+def lost_release_pattern(rng):
+    """Many distinct keys whose releases mostly never arrive."""
+    for i in count():
+        key = (chr(0x4E00 + i % 20000), KeyClass.LETTER)
+        yield key, True
+        if rng.random() < 0.1:
+            yield key, False
+
+
+def mixed_pattern(rng):
+    patterns = [
+        p(rng)
+        for p in (typing_pattern, repeat_pattern, macro_pattern, scanner_pattern)
+    ]
+    while True:
+        pattern = rng.choice(patterns)
+        for _ in range(rng.randint(100, 2000)):
+            yield next(pattern)
+
+
+PATTERNS = {
+    "typing": typing_pattern,
+    "repeat": repeat_pattern,
+    "macro": macro_pattern,
+    "scanner": scanner_pattern,
+    "lost-release": lost_release_pattern,
+    "mixed": mixed_pattern,
+}
+
+
+# --- Measurements ---
+
+
+class InstrumentedLock:
+    """Drop-in for the monitor's lock that records how long acquiring took."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = []  # seconds, reset by the sampler
+
+    def __enter__(self):
+        t0 = perf_counter()
+        self._lock.acquire()
+        self.waits.append(perf_counter() - t0)
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:  # not Linux, fall back to the peak
+        import resource
+
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def window_sizes(monitor: FatigueMonitor) -> dict[str, int]:
+    sizes = {
+        name: len(value)
+        for name, value in vars(monitor.keyboard_stats).items()
+        if isinstance(value, DataQueue)
+    }
+    return sizes
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def parse_duration(text: str) -> float:
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+# --- Driver ---
+
+
+def soak(args) -> list[str]:
+    """Run the soak test, returns the budget violations."""
+    rng = random.Random(args.seed)
+    events = PATTERNS[args.pattern](rng)
+
+    monitor = FatigueMonitor(listen=False)
+    lock = InstrumentedLock()
+    monitor._lock = lock
+    monitor.start()
+
+    latencies = []
+    failures = []
+    baseline_rss = None
+    start = time()
+    next_sample = start + args.sample_every
+    sent = 0
+    print(
+        f"{'elapsed':>8} {'events':>10} {'rss MB':>8} {'p50 us':>8} "
+        f"{'p99 us':>8} {'max us':>8} {'lock max ms':>11} "
+        f"{'unreleased':>10} {'largest window':>20}"
+    )
+
+    while True:
+        now = time()
+        elapsed = now - start
+        if elapsed >= args.duration:
+            break
+
+        # send everything that is due, then yield the CPU briefly
+        due = int(elapsed * args.rate) - sent
+        for _ in range(min(due, max(int(args.rate), 1))):
+            key, pressed = next(events)
+            t0 = perf_counter()
+            monitor.ingest(key, pressed, key[1])
+            latencies.append(perf_counter() - t0)
+            sent += 1
+
+        if now >= next_sample:
+            next_sample += args.sample_every
+            latencies.sort()
+            waits, lock.waits = lock.waits, []
+            rss = rss_bytes()
+            if baseline_rss is None and elapsed >= args.warmup:
+                baseline_rss = rss  # windows are full from here on
+            sizes = window_sizes(monitor)
+            largest = max(sizes, key=sizes.get)
+            unreleased = len(monitor.keyboard_stats.unreleased)
+            p99 = percentile(latencies, 0.99)
+            print(
+                f"{elapsed:8.0f} {sent:10d} {rss / 2**20:8.1f} "
+                f"{percentile(latencies, 0.5) * 1e6:8.1f} {p99 * 1e6:8.1f} "
+                f"{(latencies[-1] if latencies else 0) * 1e6:8.1f} "
+                f"{max(waits, default=0) * 1e3:11.2f} {unreleased:10d} "
+                f"{largest + '=' + str(sizes[largest]):>20}",
+                flush=True,
+            )
+            latencies = []
+
+            if p99 * 1e6 > args.max_p99_us:
+                failures.append(f"p99 ingest latency {p99 * 1e6:.0f} us")
+            if unreleased > args.max_unreleased:
+                failures.append(f"{unreleased} unreleased keys")
+            if sizes[largest] > args.max_window:
+                failures.append(f"{largest} holds {sizes[largest]} samples")
+            if baseline_rss is not None:
+                growth = (rss - baseline_rss) / 2**20
+                if growth > args.max_memory_growth:
+                    failures.append(f"memory grew by {growth:.1f} MB")
+            if failures and not args.keep_going:
+                break
+
+        sleep(0.001)
+
+    monitor.stop()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Soak/load test of the FatigueMonitor ingest path"
+    )
+    parser.add_argument("--pattern", choices=PATTERNS, default="mixed")
+    parser.add_argument(
+        "--rate", type=float, default=50, help="key events per second"
+    )
+    parser.add_argument(
+        "--duration", type=parse_duration, default="5m", help="e.g. 90s, 10m, 8h"
+    )
+    parser.add_argument("--sample-every", type=float, default=10)
+    parser.add_argument(
+        "--warmup",
+        type=parse_duration,
+        default="60s",
+        help="time before the memory baseline is taken (windows filling up)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-memory-growth", type=float, default=20, help="MB")
+    parser.add_argument("--max-p99-us", type=float, default=1000)
+    parser.add_argument("--max-unreleased", type=int, default=32)
+    parser.add_argument(
+        "--max-window",
+        type=int,
+        default=200_000,
+        help="most samples allowed in any one window",
+    )
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="report every violation instead of stopping at the first",
+    )
+    args = parser.parse_args()
+
+    failures = soak(args)
+    if failures:
+        print("FAILED:")
+        for failure in dict.fromkeys(failures):
+            print("  " + failure)
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
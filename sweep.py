@@ -0,0 +1,285 @@
+# sweep.py
+#
+# Evaluates fatigue thresholds, population priors and cut-offs against
+# recorded keystroke traces (see trace_recorder.py), fanning the
+# configurations out over a process pool. For every configuration it
+# reports how often the tray would have alerted and changed level.
+#
+#   python sweep.py traces/*.trace --grid high_threshold=1,1.25,1.5 \
+#       --grid virtual_n=100,400,1600
+#   python sweep.py traces/*.trace --random 2000 \
+#       --range high_threshold=0.75:2 --range hold_mu=0.08:0.14
+
+import argparse
+import csv
+import itertools
+import math
+import multiprocessing
+import random
+import sys
+from array import array
+from time import perf_counter
+
+from breather_core import (
+    KeyboardStats,
+    KeyboardEvent,
+    KeyClass,
+    FATIGUE_MODELS,
+)
+from trace_recorder import TraceReader, replay_events
+
+
+# same cadence and cool-down as the tray
+TICK_INTERVAL = 0.5
+IDLE_AFTER = 60
+ALERT_COOLDOWN = 120
+
+_PRIORS = KeyboardStats.PRIORS
+
+
+def defaults(model_name: str = "linear") -> dict:
+    """Every parameter the sweep can vary, with the values shipped today."""
+    medium, high = FATIGUE_MODELS[model_name].thresholds
+    return {
+        "medium_threshold": medium,
+        "high_threshold": high,
+        **{f"{name}_mu": mu for name, (mu, _) in _PRIORS.items()},
+        **{f"{name}_sd": math.sqrt(var) for name, (_, var) in _PRIORS.items()},
+        "virtual_n": 400,
+        "pause_cutoff": 5,
+        "hold_cutoff": 0.5,
+        "flight_cutoff": 1,
+    }
+
+
+PARAMETERS = tuple(defaults())
+
+# decoded traces as (times, pressed, keys, classes), set once per worker
+_TRACES = []
+
+
+def load_trace(path: str):
+    """Decode a trace into compact arrays that are cheap to share."""
+    times = array("d")
+    pressed = bytearray()
+    keys = array("q")
+    classes = bytearray()
+    for event in replay_events(TraceReader(path).events()):
+        times.append(event.time)
+        pressed.append(event.pressed)
+        keys.append(event.key)
+        classes.append(event.key_class)
+    return times, bytes(pressed), keys, bytes(classes)
+
+
+def _init_worker(traces):
+    # with fork the traces are inherited, not copied, by every worker
+    global _TRACES
+    _TRACES = traces
+
+
+class _ReplayClock:
+    __slots__ = ("now",)
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+THRESHOLDS = ("medium_threshold", "high_threshold")
+
+
+def replay(config, model_name: str) -> list[tuple[array, array]]:
+    """
+    Per-tick (times, fatigue scores) of every trace. The thresholds don't
+    change them, so configurations differing only in thresholds share one
+    replay.
+    """
+    model = FATIGUE_MODELS[model_name]
+    priors = {
+        name: (config[f"{name}_mu"], config[f"{name}_sd"] ** 2)
+        for name in _PRIORS
+    }
+    key_classes = list(KeyClass)
+    series = []
+    for times, pressed, keys, classes in _TRACES:
+        clock = _ReplayClock()
+        stats = KeyboardStats(
+            priors=priors, virtual_n=int(config["virtual_n"]), clock=clock
+        )
+        stats.PAUSE_CUTOFF = config["pause_cutoff"]
+        stats.HOLD_CUTOFF = config["hold_cutoff"]
+        stats.FLIGHT_CUTOFF = config["flight_cutoff"]
+
+        tick_times = array("d")
+        scores = array("d")
+        last_event = -math.inf
+        next_tick = 0.0
+
+        def tick_until(t):
+            nonlocal next_tick
+            while next_tick <= t and next_tick - last_event < IDLE_AFTER:
+                clock.now = next_tick
+                tick_times.append(next_tick)
+                scores.append(model(stats.features()))
+                next_tick += TICK_INTERVAL
+
+        for t, is_pressed, key, cls in zip(times, pressed, keys, classes):
+            tick_until(t)
+            if t - last_event >= IDLE_AFTER:  # the monitor was idle
+                stats.resume()
+                next_tick = t
+            clock.now = t
+            stats.push(
+                KeyboardEvent(key, bool(is_pressed), t, key_classes[cls])
+            )
+            last_event = t
+        tick_until(math.inf)
+        series.append((tick_times, scores))
+    return series
+
+
+def score(series, medium: float, high: float) -> dict:
+    """Alert rate, level flips and time at each level for two thresholds."""
+    ticks = alerts = flips = 0
+    level_ticks = [0, 0, 0]  # low, medium, high
+    for tick_times, scores in series:
+        last_level = None
+        last_alert = -math.inf
+        for t, fatigue in zip(tick_times, scores):
+            level = 2 if fatigue >= high else 1 if fatigue >= medium else 0
+            if level != last_level:
+                if last_level is not None:
+                    flips += 1
+                if level == 2 and t - last_alert >= ALERT_COOLDOWN:
+                    alerts += 1
+                    last_alert = t
+            last_level = level
+            level_ticks[level] += 1
+        ticks += len(scores)
+
+    hours = max(ticks * TICK_INTERVAL / 3600, 1e-9)
+    return {
+        "active_hours": round(hours, 3),
+        "alerts_per_hour": alerts / hours,
+        "flips_per_hour": flips / hours,
+        **{
+            f"frac_{level}": n / max(ticks, 1)
+            for level, n in zip(("low", "medium", "high"), level_ticks)
+        },
+    }
+
+
+def evaluate(job):
+    """
+    Replay every trace once for a group of configurations that differ only
+    in their thresholds, returns `(index, statistics)` for each of them.
+    """
+    configs, model_name = job
+    series = replay(configs[0][1], model_name)
+    return [
+        (i, {**config, **score(series, *(config[n] for n in THRESHOLDS))})
+        for i, config in configs
+    ]
+
+
+def _parse_assignment(text: str) -> tuple[str, str]:
+    name, _, value = text.partition("=")
+    if name not in PARAMETERS:
+        raise argparse.ArgumentTypeError(
+            f"unknown parameter {name!r}, one of: {', '.join(PARAMETERS)}"
+        )
+    return name, value
+
+
+def configurations(args):
+    base = defaults(args.model)
+    if args.random:
+        rng = random.Random(args.seed)
+        ranges = {}
+        for name, value in args.range:
+            lo, hi = map(float, value.split(":"))
+            ranges[name] = (lo, hi)
+        for _ in range(args.random):
+            yield {
+                **base,
+                **{n: rng.uniform(lo, hi) for n, (lo, hi) in ranges.items()},
+            }
+    else:
+        grid = {
+            name: [float(v) for v in value.split(",")]
+            for name, value in args.grid
+        }
+        for values in itertools.product(*grid.values()):
+            yield {**base, **dict(zip(grid, values))}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sweep fatigue parameters over recorded keystroke traces"
+    )
+    parser.add_argument("traces", nargs="+", help="TraceRecorder files")
+    parser.add_argument(
+        "--grid",
+        type=_parse_assignment,
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2,...",
+    )
+    parser.add_argument(
+        "--random", type=int, default=0, help="number of random configurations"
+    )
+    parser.add_argument(
+        "--range",
+        type=_parse_assignment,
+        action="append",
+        default=[],
+        metavar="NAME=LO:HI",
+        help="range sampled by --random",
+    )
+    parser.add_argument("--model", choices=FATIGUE_MODELS, default="linear")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--out", help="CSV output file (default stdout)")
+    args = parser.parse_args()
+
+    t0 = perf_counter()
+    traces = [load_trace(path) for path in args.traces]
+    configs = list(configurations(args))
+    events = sum(len(trace[0]) for trace in traces)
+    print(
+        f"{len(traces)} traces, {events} events, {len(configs)} configurations",
+        file=sys.stderr,
+    )
+
+    # one replay per distinct set of non-threshold parameters
+    groups = {}
+    for i, config in enumerate(configs):
+        key = tuple(v for n, v in config.items() if n not in THRESHOLDS)
+        groups.setdefault(key, []).append((i, config))
+    jobs = [(group, args.model) for group in groups.values()]
+    print(f"{len(jobs)} replays", file=sys.stderr)
+
+    results = [None] * len(configs)
+    with multiprocessing.Pool(
+        args.processes, initializer=_init_worker, initargs=(traces,)
+    ) as pool:
+        for done, group in enumerate(pool.imap_unordered(evaluate, jobs), 1):
+            for i, result in group:
+                results[i] = result
+            if done % 50 == 0:
+                print(f"{done}/{len(jobs)} replays", file=sys.stderr)
+
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    writer = csv.DictWriter(out, fieldnames=list(results[0]))
+    writer.writeheader()
+    writer.writerows(results)
+    if args.out:
+        out.close()
+    print(f"done in {perf_counter() - t0:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# trace_recorder.py
+
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+from datetime import datetime
+
+from breather_core import KeyClass, KeyboardEvent
+
+try:
+    import zstandard
+except ImportError:  # zlib is always there, zstd just compresses better
+    zstandard = None
+
+
+FILE_MAGIC = b"BRTRACE1"
+FRAME_MAGIC = b"BRFR"
+INDEX_MAGIC = b"BRIX"
+END_MAGIC = b"BREN"
+
+# magic, codec, first time (us), last time (us), event count, payload length
+FRAME_HEADER = struct.Struct("<4sBQQII")
+# first time (us), last time (us), frame offset
+INDEX_ENTRY = struct.Struct("<QQQ")
+# index offset, magic
+FILE_TAIL = struct.Struct("<Q4s")
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+MAX_SLOT = 7  # held keys we can tell apart, fits the 3 slot bits
+
+
+# One event is a varint time delta (us) and a code byte:
+#   bit 0     pressed
+#   bits 1-3  slot
+#   bits 4-7  key class
+# The slot ties releases (and auto-repeat presses) to the press they belong
+# to without recording which key it was: for a press, 0 is a key that was
+# not held and n is a repeat of the n-th held key; for a release, n is the
+# n-th held key and 0 a key we did not see go down.
+
+
+def _encode_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _compress(payload: bytes) -> tuple[int, bytes]:
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=9).compress(payload)
+    return CODEC_ZLIB, zlib.compress(payload, 9)
+
+
+def _decompress(codec: int, data: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Trace frame is zstd compressed, needs zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown trace codec {codec}")
+
+
+class TraceRecorder:
+    """
+    Opt-in recorder of the raw keystroke timing stream.
+
+    The listener thread only appends to a bounded deque; a background thread
+    encodes the events and their key classes and writes them as independently
+    compressed frames. An index of the frames is appended on `close()`, a file
+    without one (e.g. after a crash) can still be read by scanning frames.
+
+    Every recorder writes a new `<path stem>-<start time><ext>` next to
+    `path`, so a restart never overwrites an earlier recording.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        block_events: int = 4096,
+        flush_interval: float = 30,
+        max_pending: int = 65536,
+    ):
+        self.block_events = block_events
+        self.flush_interval = flush_interval
+        self.dropped = 0  # events lost because the writer fell behind
+
+        self._pending = deque(maxlen=max_pending)
+        self._held = []  # keys currently down, oldest first
+        self._index = []
+        self._file = self._open(path)
+        self.path = self._file.name
+        self._file.write(FILE_MAGIC)
+
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _open(path: str):
+        root, ext = os.path.splitext(path)
+        stamp = datetime.now().strftime("%Y-%m-%d-%H%M%S")
+        name = f"{root}-{stamp}{ext}"
+        n = 0
+        while True:
+            try:
+                return open(name, "xb")
+            except FileExistsError:  # restarted within the same second
+                n += 1
+                name = f"{root}-{stamp}-{n}{ext}"
+
+    def record(self, event):
+        """Called on the listener thread for every `KeyboardEvent`."""
+        pending = self._pending
+        if len(pending) == pending.maxlen:
+            self.dropped += 1
+        pending.append((event.time, event.pressed, event.key, event.key_class))
+        if len(pending) >= self.block_events:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._write_pending()
+        self._write_pending()
+
+    def _write_pending(self):
+        pending = self._pending
+        while pending:
+            n = min(len(pending), self.block_events)
+            self._write_frame([pending.popleft() for _ in range(n)])
+
+    def _slot(self, key, pressed: bool) -> int:
+        held = self._held
+        try:
+            i = held.index(key)
+        except ValueError:
+            if pressed:
+                held.append(key)
+                if len(held) > MAX_SLOT:  # forget the oldest, as replays do
+                    del held[0]
+            return 0
+        if not pressed:
+            del held[i]
+        return i + 1
+
+    def _write_frame(self, events):
+        payload = bytearray()
+        first_us = last_us = round(events[0][0] * 1e6)
+        prev_us = first_us
+        for t, pressed, key, cls in events:
+            # clamp so clock steps backwards never produce a negative delta
+            last_us = max(round(t * 1e6), prev_us)
+            _encode_varint(payload, last_us - prev_us)
+            prev_us = last_us
+            code = cls << 4 | self._slot(key, pressed) << 1 | pressed
+            payload.append(code)
+
+        codec, data = _compress(bytes(payload))
+        offset = self._file.tell()
+        self._file.write(
+            FRAME_HEADER.pack(
+                FRAME_MAGIC, codec, first_us, last_us, len(events), len(data)
+            )
+        )
+        self._file.write(data)
+        self._file.flush()
+        self._index.append((first_us, last_us, offset))
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+        index_offset = self._file.tell()
+        self._file.write(INDEX_MAGIC)
+        self._file.write(struct.pack("<I", len(self._index)))
+        for entry in self._index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(FILE_TAIL.pack(index_offset, END_MAGIC))
+        self._file.close()
+
+
+class TraceReader:
+    """Reads `TraceRecorder` files, decoding only the frames it needs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                raise ValueError(f"{path} is not a keystroke trace")
+            self.index = self._read_index(f) or self._scan_frames(f)
+
+    @staticmethod
+    def _read_index(f):
+        size = f.seek(0, 2)
+        if size < len(FILE_MAGIC) + FILE_TAIL.size:
+            return None
+        f.seek(size - FILE_TAIL.size)
+        index_offset, magic = FILE_TAIL.unpack(f.read(FILE_TAIL.size))
+        if magic != END_MAGIC:
+            return None
+        f.seek(index_offset)
+        if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            return None
+        (count,) = struct.unpack("<I", f.read(4))
+        return [
+            INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size)) for _ in range(count)
+        ]
+
+    @staticmethod
+    def _scan_frames(f):
+        index = []
+        size = f.seek(0, 2)
+        offset = f.seek(len(FILE_MAGIC))
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                break
+            magic, _, first_us, last_us, _, length = FRAME_HEADER.unpack(
+                header
+            )
+            if magic != FRAME_MAGIC or f.tell() + length > size:
+                break  # index or a frame cut short by a crash
+            index.append((first_us, last_us, offset))
+            offset = f.seek(length, 1)
+        return index
+
+    def events(self, start: float | None = None, end: float | None = None):
+        """
+        Yield `(time, pressed, key_class, slot)` for the events between
+        `start` and `end` (seconds since the epoch, both optional).
+        """
+        start_us = -1 if start is None else start * 1e6
+        end_us = float("inf") if end is None else end * 1e6
+        with open(self.path, "rb") as f:
+            for first_us, last_us, offset in self.index:
+                if last_us < start_us or first_us > end_us:
+                    continue
+                f.seek(offset)
+                _, codec, first_us, _, count, length = FRAME_HEADER.unpack(
+                    f.read(FRAME_HEADER.size)
+                )
+                payload = _decompress(codec, f.read(length))
+                t_us = first_us
+                pos = 0
+                for _ in range(count):
+                    delta = shift = 0
+                    while True:
+                        byte = payload[pos]
+                        pos += 1
+                        delta |= (byte & 0x7F) << shift
+                        shift += 7
+                        if byte < 0x80:
+                            break
+                    t_us += delta
+                    code = payload[pos]
+                    pos += 1
+                    if start_us <= t_us <= end_us:
+                        yield (
+                            t_us / 1e6,
+                            bool(code & 1),
+                            KeyClass(code >> 4),
+                            code >> 1 & 0x7,
+                        )
+
+
+def replay_events(events):
+    """
+    Turn `TraceReader.events()` into `KeyboardEvent`s with synthetic keys:
+    a new int for every key that goes down, so holds pair up as in the
+    original stream.
+    """
+    held = []  # mirrors TraceRecorder._held
+    next_id = 0
+    for t, pressed, cls, slot in events:
+        if slot:
+            key = held[slot - 1] if slot <= len(held) else -1
+            if not pressed and slot <= len(held):
+                del held[slot - 1]
+        else:
+            key = next_id
+            next_id += 1
+            if pressed:
+                held.append(key)
+                if len(held) > MAX_SLOT:
+                    del held[0]
+        yield KeyboardEvent(key, pressed, t, cls)